@@ -6,6 +6,7 @@ from models.recipe_recommender import RecipeRecommender
 from models.ingredient_substitution import IngredientSubstitutionFinder
 from models.cuisine_classifier import CuisineClassifier
 from models.nutrition_predictor import NutritionPredictor
+from models.recipe_catalog import get_world_catalog
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
@@ -13,8 +14,12 @@ CORS(app)  # Enable CORS for frontend communication
 # Configuration
 app.config['DEBUG'] = True
 app.config['JSON_SORT_KEYS'] = False
+app.config['NUTRITION_BATCH_LIMIT'] = 5000  # Max recipes per batch nutrition request
+app.config['CUISINE_BATCH_LIMIT'] = 5000  # Max recipes per batch cuisine request
+app.config['CLUSTER_BATCH_LIMIT'] = 5000  # Max ingredients per batch cluster request
 
 # Initialize ML models
+recipe_catalog = None
 ingredient_clusterer = None
 recipe_recommender = None
 substitution_finder = None
@@ -23,10 +28,14 @@ nutrition_predictor = None
 
 def init_models():
     """Initialize all ML models"""
-    global ingredient_clusterer, recipe_recommender, substitution_finder, cuisine_classifier, nutrition_predictor
+    global recipe_catalog, ingredient_clusterer, recipe_recommender, substitution_finder, cuisine_classifier, nutrition_predictor
     
     print("\n🤖 Initializing ML Models...")
     
+    # Load the world recipes once; shared by the models below
+    recipe_catalog = get_world_catalog()
+    print(f"✅ Recipe catalog loaded ({len(recipe_catalog)} recipes)")
+    
     # Initialize Ingredient Clustering
     ingredient_clusterer = get_trained_model()
     print("✅ Ingredient clustering model ready!")
@@ -37,17 +46,17 @@ def init_models():
     print("✅ Recipe recommendation model ready!")
     
     # Initialize Ingredient Substitution Finder
-    substitution_finder = IngredientSubstitutionFinder(min_support=0.02, min_confidence=0.15)
+    substitution_finder = IngredientSubstitutionFinder(min_support=0.02, min_confidence=0.15, catalog=recipe_catalog)
     substitution_finder.train()
     print("✅ Ingredient substitution finder ready!")
     
     # Initialize Cuisine Classifier
-    cuisine_classifier = CuisineClassifier(n_neighbors=5)
+    cuisine_classifier = CuisineClassifier(n_neighbors=5, catalog=recipe_catalog)
     cuisine_classifier.train()
     print("✅ Cuisine classifier ready!")
     
     # Initialize Nutrition Predictor
-    nutrition_predictor = NutritionPredictor(use_ridge=True, alpha=1.0)
+    nutrition_predictor = NutritionPredictor(use_ridge=True, alpha=1.0, catalog=recipe_catalog)
     nutrition_predictor.train()
     print("✅ Nutrition predictor ready!")
     
@@ -86,18 +95,22 @@ def recommend_for_user(user_id):
     
     Query params:
         top_n: Number of recommendations (default: 5)
+        method: 'user' (user-user), 'item' (item-item) or 'als' (matrix factorization)
+                (default: user)
     """
     try:
         top_n = request.args.get('top_n', default=5, type=int)
+        method = request.args.get('method', default='user')
         
         recommendations = recipe_recommender.get_user_based_recommendations(
             user_id=user_id,
-            top_n=top_n
+            top_n=top_n,
+            method=method
         )
         
         return jsonify({
             'user_id': user_id,
-            'method': 'collaborative_filtering',
+            'method': RecipeRecommender.COLLABORATIVE_METHODS[method],
             'recommendations': recommendations,
             'total': len(recommendations)
         })
@@ -106,6 +119,48 @@ def recommend_for_user(user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ratings', methods=['POST'])
+def add_ratings():
+    """
+    Add or update user ratings without retraining
+    
+    Body:
+        ratings: List of {user_id, recipe_id, rating} objects
+                 (a single {user_id, recipe_id, rating} object is also accepted)
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        ratings = data.get('ratings', [data] if 'rating' in data else [])
+        
+        if not ratings:
+            return jsonify({
+                'success': False,
+                'error': 'No ratings provided'
+            }), 400
+        
+        summary = recipe_recommender.add_ratings(ratings)
+        
+        return jsonify({
+            'success': True,
+            **summary
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/recommend/similar/<int:recipe_id>', methods=['GET'])
 def recommend_similar_recipes(recipe_id):
     """
@@ -155,34 +210,18 @@ def recommend_recipes():
                 'error': 'No ingredients provided'
             }), 400
         
-        # Get all recipes
-        all_recipes = recipe_recommender.get_all_recipes()
-        
-        # Score recipes based on ingredient overlap
-        scored_recipes = []
-        for recipe in all_recipes:
-            recipe_ingredients = set([ing.lower() for ing in recipe.get('ingredients', [])])
-            input_ingredients = set([ing.lower().strip() for ing in ingredients])
-            
-            # Calculate overlap
-            overlap = len(recipe_ingredients.intersection(input_ingredients))
-            if overlap > 0:
-                score = overlap / len(recipe_ingredients)  # Percentage of recipe ingredients matched
-                scored_recipes.append({
-                    'recipe': recipe,
-                    'matched_ingredients': list(recipe_ingredients.intersection(input_ingredients)),
-                    'overlap_score': round(score, 3),
-                    'total_ingredients': len(recipe_ingredients)
-                })
-        
-        # Sort by overlap score
-        scored_recipes.sort(key=lambda x: x['overlap_score'], reverse=True)
+        # Score only the recipes sharing an ingredient with the input
+        matches, total_matches = recipe_recommender.search_by_ingredients(ingredients, top_n=10)
+        scored_recipes = [
+            {**match, 'overlap_score': round(match['overlap_score'], 3)}
+            for match in matches
+        ]
         
         return jsonify({
             'success': True,
             'input_ingredients': ingredients,
-            'recommended_recipes': scored_recipes[:10],  # Top 10
-            'total_matches': len(scored_recipes)
+            'recommended_recipes': scored_recipes,  # Top 10
+            'total_matches': total_matches
         })
     except Exception as e:
         return jsonify({
@@ -256,6 +295,80 @@ def predict_cluster():
             'error': str(e)
         }), 500
 
+@app.route('/api/cluster/predict/batch', methods=['POST'])
+def predict_cluster_batch():
+    """
+    Predict clusters for many ingredients in one request
+    
+    Body:
+        ingredients: List of items, each {"name": ..., "features": [...]} or a bare
+                     feature list (protein, carbs, fat, calories, fiber)
+    
+    Results are returned in input order; each cluster used is described once.
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        items = data.get('ingredients', [])
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'No ingredients provided'
+            }), 400
+        
+        limit = app.config['CLUSTER_BATCH_LIMIT']
+        if len(items) > limit:
+            return jsonify({
+                'success': False,
+                'error': f'Too many ingredients: {len(items)} (limit {limit})'
+            }), 400
+        
+        names, feature_rows = [], []
+        for position, item in enumerate(items):
+            features = item.get('features') if isinstance(item, dict) else item
+            if not isinstance(features, list) or len(features) != 5:
+                raise ValueError(f'Item {position} features must include: protein, carbs, fat, calories, fiber')
+            names.append(item.get('name', 'Unknown Ingredient') if isinstance(item, dict) else 'Unknown Ingredient')
+            feature_rows.append(features)
+        
+        cluster_ids = ingredient_clusterer.predict_many(feature_rows)
+        cluster_names = ingredient_clusterer.get_cluster_names()
+        clusters = ingredient_clusterer.get_clusters()
+        
+        return jsonify({
+            'success': True,
+            'results': [{
+                'index': position,
+                'ingredient': name,
+                'cluster_id': cluster_id,
+                'cluster_name': cluster_names.get(cluster_id, f"Cluster {cluster_id}")
+            } for position, (name, cluster_id) in enumerate(zip(names, cluster_ids))],
+            'clusters': {
+                cluster_id: {
+                    'cluster_name': cluster_names.get(cluster_id, f"Cluster {cluster_id}"),
+                    'similar_ingredients': clusters.get(cluster_id, [])
+                } for cluster_id in sorted(set(cluster_ids))
+            },
+            'total': len(cluster_ids)
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ===== FEATURE #3: INGREDIENT SUBSTITUTION ENDPOINTS =====
 
 @app.route('/api/substitute', methods=['POST'])
@@ -265,6 +378,7 @@ def find_substitutes():
         data = request.get_json()
         ingredient = data.get('ingredient', '').lower().strip()
         top_n = data.get('top_n', 5)
+        context = data.get('context', [])
         
         if not ingredient:
             return jsonify({
@@ -272,11 +386,18 @@ def find_substitutes():
                 'error': 'No ingredient provided'
             }), 400
         
-        substitutes = substitution_finder.get_substitutes(ingredient, top_n=top_n)
+        if not isinstance(context, list) or not all(isinstance(name, str) for name in context):
+            return jsonify({
+                'success': False,
+                'error': 'context must be a list of ingredient names'
+            }), 400
+        
+        substitutes = substitution_finder.get_substitutes(ingredient, top_n=top_n, context=context)
         
         return jsonify({
             'success': True,
             'ingredient': ingredient,
+            'context': context,
             'substitutes': substitutes
         })
     
@@ -290,10 +411,10 @@ def find_substitutes():
 def get_available_ingredients():
     """Get list of all ingredients with substitution rules"""
     try:
-        ingredients = list(substitution_finder.substitution_rules.keys())
+        ingredients = substitution_finder.get_ingredients_with_substitutes()
         return jsonify({
             'success': True,
-            'ingredients': sorted(ingredients),
+            'ingredients': ingredients,
             'total': len(ingredients)
         })
     except Exception as e:
@@ -326,6 +447,66 @@ def predict_cuisine():
             'error': str(e)
         }), 500
 
+@app.route('/api/cuisine/predict/batch', methods=['POST'])
+def predict_cuisine_batch():
+    """
+    Predict cuisines for many ingredient lists in one request
+    
+    Body:
+        recipes: List of items, each an ingredient list or {"ingredients": [...]}
+    
+    Results are returned in input order.
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        items = data.get('recipes', [])
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'No recipes provided'
+            }), 400
+        
+        limit = app.config['CUISINE_BATCH_LIMIT']
+        if len(items) > limit:
+            return jsonify({
+                'success': False,
+                'error': f'Too many recipes: {len(items)} (limit {limit})'
+            }), 400
+        
+        ingredient_lists = []
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                item = item.get('ingredients')
+            if not isinstance(item, list) or not all(isinstance(ing, str) for ing in item):
+                raise ValueError(f'Item {position} must be an ingredient list')
+            ingredient_lists.append(item)
+        
+        predictions = cuisine_classifier.predict_many(ingredient_lists)
+        
+        return jsonify({
+            'success': True,
+            'results': [{'index': position, **prediction} for position, prediction in enumerate(predictions)],
+            'total': len(predictions)
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/cuisine/stats', methods=['GET'])
 def get_cuisine_stats():
     """Get cuisine classification statistics"""
@@ -384,6 +565,96 @@ def predict_nutrition():
             'error': str(e)
         }), 500
 
+@app.route('/api/nutrition/predict/batch', methods=['POST'])
+def predict_nutrition_batch():
+    """
+    Predict nutrition for many recipes in one request
+    
+    Body:
+        recipes: List of items, each an ingredient list, a recipe id,
+                 {"ingredients": [...]} or {"recipe_id": id}
+    
+    Results are returned in input order.
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        items = data.get('recipes', [])
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'No recipes provided'
+            }), 400
+        
+        limit = app.config['NUTRITION_BATCH_LIMIT']
+        if len(items) > limit:
+            return jsonify({
+                'success': False,
+                'error': f'Too many recipes: {len(items)} (limit {limit})'
+            }), 400
+        
+        recipes = []
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                item = item.get('ingredients', item.get('recipe_id'))
+            if isinstance(item, list) and all(isinstance(ing, str) for ing in item):
+                if not item:
+                    raise ValueError(f'Item {position} has no ingredients')
+                recipes.append(item)
+            elif isinstance(item, int) and not isinstance(item, bool):
+                recipes.append(item)
+            else:
+                raise ValueError(f'Item {position} must be an ingredient list or a recipe id')
+        
+        predictions = nutrition_predictor.predict_many(recipes)
+        
+        results = []
+        for position, (recipe, prediction) in enumerate(zip(recipes, predictions)):
+            if prediction is None:
+                results.append({
+                    'index': position,
+                    'success': False,
+                    'recipe_id': recipe,
+                    'error': 'Recipe not found'
+                })
+            elif isinstance(recipe, list):
+                results.append({
+                    'index': position,
+                    'success': True,
+                    'ingredients': recipe,
+                    'nutrition': prediction
+                })
+            else:
+                results.append({
+                    'index': position,
+                    'success': True,
+                    **prediction
+                })
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total': len(results),
+            'model': 'Ridge Regression' if nutrition_predictor.use_ridge else 'Linear Regression'
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/nutrition/recipe/<int:recipe_id>', methods=['GET'])
 def get_recipe_nutrition(recipe_id):
     """Get predicted nutrition for a specific recipe"""
@@ -0,0 +1,188 @@
+"""
+Bulk Cuisine Labeling
+Reads recipes as JSON lines, classifies them in chunks (one neighbor search
+per chunk) on a process pool and writes one JSON line per recipe, in input
+order. Memory stays bounded: only a few chunks per worker are in flight.
+
+Usage:
+    python label_cuisines.py recipes.jsonl -o labeled.jsonl --jobs 4
+
+Each input line is a recipe object with an 'ingredients' list (its 'id' and
+'name' are copied to the output when present) or a bare ingredient list.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+from models.cuisine_classifier import CuisineClassifier
+
+
+# Per-process classifier for pool workers, set once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(classifier):
+    _worker_state['classifier'] = classifier
+
+
+def parse_line(line):
+    """
+    Ingredient list and passthrough fields of one input line
+
+    Raises:
+        ValueError: If the line is not a recipe object or an ingredient list
+    """
+    recipe = json.loads(line)
+    if isinstance(recipe, list):
+        ingredients, fields = recipe, {}
+    elif isinstance(recipe, dict):
+        ingredients = recipe.get('ingredients')
+        fields = {key: recipe[key] for key in ('id', 'name') if key in recipe}
+    else:
+        raise ValueError('Line must be a recipe object or an ingredient list')
+
+    if not isinstance(ingredients, list) or not all(isinstance(ing, str) for ing in ingredients):
+        raise ValueError("'ingredients' must be a list of ingredient names")
+    return ingredients, fields
+
+
+def label_chunk(number, lines, classifier=None):
+    """
+    Classify one chunk of input lines
+
+    Returns:
+        Tuple of (chunk number, output JSON lines)
+    """
+    classifier = _worker_state['classifier'] if classifier is None else classifier
+
+    parsed = []
+    for line in lines:
+        try:
+            parsed.append(parse_line(line))
+        except ValueError as e:  # json.JSONDecodeError is a ValueError too
+            parsed.append(e)
+
+    valid = [item for item in parsed if not isinstance(item, Exception)]
+    predictions = iter(classifier.predict_many([ingredients for ingredients, _ in valid], chunk_size=len(lines)))
+
+    output = []
+    for item in parsed:
+        if isinstance(item, Exception):
+            result = {'success': False, 'error': f'Invalid line: {item}'}
+        else:
+            prediction = next(predictions)
+            result = {**item[1], **_summary(prediction)}
+        output.append(json.dumps(result))
+    return number, output
+
+
+def _summary(prediction):
+    if not prediction['success']:
+        return {'success': False, 'error': prediction['error']}
+    return {
+        'success': True,
+        'cuisine': prediction['predicted_cuisine'],
+        'confidence': round(prediction['confidence'], 2),
+        'top_predictions': [{'cuisine': p['cuisine'], 'probability': round(p['probability'], 4)}
+                            for p in prediction['top_predictions']],
+        'matched_count': prediction['matched_count']
+    }
+
+
+def _chunks(lines, chunk_size):
+    lines = (line for line in lines if line.strip())
+    for number, chunk in enumerate(iter(lambda: list(islice(lines, chunk_size)), [])):
+        yield number, chunk
+
+
+def label_stream(lines, output, classifier, chunk_size=1000, n_jobs=1):
+    """
+    Label every recipe of a JSONL stream
+
+    Args:
+        lines: Iterable of input lines
+        output: Text file the labeled JSON lines are written to
+        classifier: Trained CuisineClassifier
+        chunk_size: Recipes classified per neighbor search
+        n_jobs: Worker processes (1 = label in this process)
+
+    Returns:
+        Number of recipes labeled
+    """
+    written = 0
+
+    def write(chunk_lines):
+        nonlocal written
+        for line in chunk_lines:
+            output.write(line + '\n')
+        written += len(chunk_lines)
+
+    if n_jobs is None or n_jobs <= 1:
+        for number, chunk in _chunks(lines, chunk_size):
+            write(label_chunk(number, chunk, classifier)[1])
+        return written
+
+    # Chunks finish out of order; hold them until every earlier chunk is written
+    finished_chunks = {}
+    next_chunk = 0
+
+    def collect(finished):
+        nonlocal next_chunk
+        finished_chunks.update(future.result() for future in finished)
+        while next_chunk in finished_chunks:
+            write(finished_chunks.pop(next_chunk))
+            next_chunk += 1
+
+    # Keep at most two chunks per worker in flight or waiting for an earlier
+    # chunk to bound memory: a slow head chunk stops new submissions instead
+    # of letting finished chunks pile up behind it
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(classifier,)) as pool:
+        pending = set()
+        for number, chunk in _chunks(lines, chunk_size):
+            pending.add(pool.submit(label_chunk, number, chunk))
+            while len(pending) + len(finished_chunks) >= 2 * n_jobs:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(wait(pending).done)
+
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Label recipes (JSON lines) with cuisines')
+    parser.add_argument('input', help="Input JSONL file ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="Output JSONL file (default: stdout)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Recipes per neighbor search')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--neighbors', type=int, default=5, help='k of the k-NN classifier')
+    parser.add_argument('--index', choices=['euclidean', 'cosine', 'jaccard'], default=None,
+                        help='Use the sparse inverted-index neighbor search with this metric')
+    parser.add_argument('--centroid-margin', type=float, default=None,
+                        help='Classify by cuisine centroid unless the top two scores are within this margin')
+    args = parser.parse_args(argv)
+
+    # Training messages go to stderr so stdout can carry the labeled recipes
+    with contextlib.redirect_stdout(sys.stderr):
+        classifier = CuisineClassifier(n_neighbors=args.neighbors, neighbor_index=args.index,
+                                       centroid_margin=args.centroid_margin).train()
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    target = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        count = label_stream(source, target, classifier, args.chunk_size, args.jobs)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"✅ Labeled {count} recipes", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Nearest-Neighbor Indexes for Recipe Vectors
+Exact brute-force search and approximate random-projection LSH behind one
+build / query / add / save / load interface, plus a recall vs latency report
+"""
+
+import time
+import numpy as np
+
+
+METRICS = ('cosine', 'dot')
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+class ExactIndex:
+    """
+    Brute-force nearest-neighbor search (the reference for recall)
+    """
+
+    def __init__(self, metric='cosine'):
+        """
+        Initialize the index
+
+        Args:
+            metric: 'cosine' similarity or 'dot' (inner product)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Metric must be one of: {', '.join(METRICS)}")
+        self.metric = metric
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _prepare(self, vectors):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        return _normalize(vectors) if self.metric == 'cosine' else vectors
+
+    def build(self, vectors):
+        """Index the given vectors (row i gets id i)"""
+        self.vectors = np.ascontiguousarray(self._prepare(vectors))
+        return self
+
+    def add(self, vectors):
+        """Append vectors; they get the next ids"""
+        vectors = self._prepare(vectors)
+        self.vectors = vectors if len(self) == 0 else np.vstack([self.vectors, vectors])
+        return self
+
+    def _rank(self, query, candidates, k):
+        """Top-k of the candidate ids by similarity to the prepared query"""
+        scores = self.vectors[candidates] @ query
+        k = min(k, len(candidates))
+        if k <= 0:
+            return np.array([], dtype=int), np.array([], dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Sort by score, breaking ties by id
+        top = top[np.lexsort((candidates[top], -scores[top]))]
+        return candidates[top], scores[top]
+
+    def query(self, vector, k=10):
+        """
+        Find the k most similar indexed vectors
+
+        Returns:
+            Tuple of (ids, scores) sorted by descending similarity
+        """
+        query = self._prepare(vector)[0]
+        return self._rank(query, np.arange(len(self)), k)
+
+    def save(self, filepath):
+        """Save the index to an .npz file"""
+        np.savez(filepath, vectors=self.vectors, metric=self.metric)
+
+    @classmethod
+    def load(cls, filepath):
+        """Load an index saved with save()"""
+        data = np.load(filepath)
+        index = cls(metric=str(data['metric']))
+        index.vectors = data['vectors']
+        return index
+
+
+class RandomProjectionLSH(ExactIndex):
+    """
+    Approximate search with sign random projections (SimHash)
+
+    Each table hashes a vector to the signs of n_bits random projections.
+    A query collects the vectors sharing its bucket (and, with probing,
+    the buckets one bit away) in every table, then ranks only those
+    candidates exactly.
+    """
+
+    def __init__(self, metric='cosine', n_tables=8, n_bits=16, probe=True, random_state=42):
+        """
+        Initialize the index
+
+        Args:
+            metric: 'cosine' similarity or 'dot' (inner product) for the final ranking
+            n_tables: Number of independent hash tables (more = higher recall)
+            n_bits: Projections per table (more = smaller buckets, faster queries)
+            probe: Also look up buckets at Hamming distance 1 from the query's
+            random_state: Seed for the projections
+        """
+        super().__init__(metric)
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.probe = probe
+        self.random_state = random_state
+        self.planes = None
+        self.codes = np.zeros((0, n_tables), dtype=np.int64)
+        self.buckets = []
+
+    def _hash(self, vectors):
+        """Bucket code of every vector in every table, shape (n, n_tables)"""
+        projections = vectors @ self.planes  # (n, n_tables * n_bits)
+        bits = (projections > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        weights = 1 << np.arange(self.n_bits, dtype=np.int64)
+        return bits.astype(np.int64) @ weights
+
+    def _init_planes(self, dim):
+        rng = np.random.default_rng(self.random_state)
+        self.planes = rng.standard_normal((dim, self.n_tables * self.n_bits)).astype(np.float32)
+
+    def _rebuild_buckets(self):
+        """Group ids by code in each table: {code: array of ids}"""
+        self.buckets = []
+        for table in range(self.n_tables):
+            codes = self.codes[:, table]
+            order = np.argsort(codes, kind='stable')
+            unique_codes, starts = np.unique(codes[order], return_index=True)
+            groups = np.split(order, starts[1:])
+            self.buckets.append(dict(zip(unique_codes.tolist(), groups)))
+
+    def build(self, vectors):
+        super().build(vectors)
+        self._init_planes(self.vectors.shape[1])
+        self.codes = self._hash(self.vectors)
+        self._rebuild_buckets()
+        return self
+
+    def add(self, vectors):
+        first_id = len(self)
+        super().add(vectors)
+        if self.planes is None:
+            self._init_planes(self.vectors.shape[1])
+            self.buckets = [{} for _ in range(self.n_tables)]
+
+        new_codes = self._hash(self.vectors[first_id:])
+        self.codes = np.vstack([self.codes, new_codes])
+        new_ids = np.arange(first_id, len(self))
+        for table, buckets in enumerate(self.buckets):
+            for code, item_id in zip(new_codes[:, table].tolist(), new_ids):
+                existing = buckets.get(code)
+                buckets[code] = np.array([item_id]) if existing is None else np.append(existing, item_id)
+        return self
+
+    def candidates(self, query):
+        """Ids sharing a (probed) bucket with the prepared query in any table"""
+        codes = self._hash(query[None, :])[0]
+        flips = [0] + ([1 << bit for bit in range(self.n_bits)] if self.probe else [])
+
+        found = []
+        for table, code in enumerate(codes.tolist()):
+            buckets = self.buckets[table]
+            for flip in flips:
+                ids = buckets.get(code ^ flip)
+                if ids is not None:
+                    found.append(ids)
+
+        if not found:
+            return np.array([], dtype=int)
+        return np.unique(np.concatenate(found))
+
+    def query(self, vector, k=10):
+        query = self._prepare(vector)[0]
+        return self._rank(query, self.candidates(query), k)
+
+    def save(self, filepath):
+        np.savez(
+            filepath, vectors=self.vectors, metric=self.metric, planes=self.planes,
+            config=np.array([self.n_tables, self.n_bits, int(self.probe), self.random_state])
+        )
+
+    @classmethod
+    def load(cls, filepath):
+        data = np.load(filepath)
+        n_tables, n_bits, probe, random_state = data['config'].tolist()
+        index = cls(metric=str(data['metric']), n_tables=n_tables, n_bits=n_bits,
+                    probe=bool(probe), random_state=random_state)
+        index.vectors = data['vectors']
+        index.planes = data['planes']
+        index.codes = index._hash(index.vectors)
+        index._rebuild_buckets()
+        return index
+
+
+def recall_report(index, vectors, queries, k=10):
+    """
+    Compare an approximate index against exact search
+
+    Args:
+        index: Index to evaluate (built here on the given vectors)
+        vectors: Vectors to index
+        queries: Query vectors
+        k: Neighbors per query
+
+    Returns:
+        Dictionary with recall@k and mean query latency of both indexes
+    """
+    exact = ExactIndex(metric=index.metric).build(vectors)
+    index.build(vectors)
+
+    def timed(search_index):
+        results = []
+        start_time = time.perf_counter()
+        for query in queries:
+            results.append(search_index.query(query, k)[0])
+        return results, (time.perf_counter() - start_time) * 1000 / len(queries)
+
+    exact_results, exact_ms = timed(exact)
+    approx_results, approx_ms = timed(index)
+
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx_results, exact_results))
+    total = sum(len(e) for e in exact_results)
+
+    return {
+        'n_vectors': len(vectors),
+        'k': k,
+        f'recall@{k}': hits / max(total, 1),
+        'exact_ms_per_query': exact_ms,
+        'approx_ms_per_query': approx_ms
+    }
+
+
+# Recall vs latency on synthetic clustered vectors
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((200, 32))
+    vectors = centers[rng.integers(0, 200, 100000)] + 0.3 * rng.standard_normal((100000, 32))
+    queries = vectors[rng.choice(len(vectors), 200, replace=False)]
+
+    print(f"{'tables':>6} {'bits':>5} {'recall@10':>10} {'exact ms':>9} {'lsh ms':>8}")
+    for n_tables, n_bits in [(4, 16), (8, 16), (8, 12), (16, 12)]:
+        report = recall_report(RandomProjectionLSH(n_tables=n_tables, n_bits=n_bits), vectors, queries)
+        print(f"{n_tables:>6} {n_bits:>5} {report['recall@10']:>10.3f} "
+              f"{report['exact_ms_per_query']:>9.3f} {report['approx_ms_per_query']:>8.3f}")
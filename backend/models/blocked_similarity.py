@@ -0,0 +1,196 @@
+"""
+Blocked Similarity Computation
+Cuts a feature matrix into row tiles, scores each tile against all rows
+(cosine or Jaccard) and keeps only the top-K per row, optionally on a
+process pool, so the full pairwise matrix never exists in memory
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+try:
+    from .neighbors import TopKNeighbors, top_k_from_block
+except ImportError:
+    from neighbors import TopKNeighbors, top_k_from_block
+
+
+METRICS = ('cosine', 'jaccard')
+
+# Default ceiling for one dense similarity tile (rows x columns x 8 bytes)
+DEFAULT_MAX_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def prepare_features(X, metric):
+    """
+    Transform features so a tile's similarity is a plain product
+
+    cosine: rows are L2-normalized
+    jaccard: features are binarized (presence / absence)
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Metric must be one of: {', '.join(METRICS)}")
+
+    if metric == 'cosine':
+        X = X if sparse.issparse(X) else np.asarray(X)
+        return normalize(X.astype(np.float64))
+
+    if sparse.issparse(X):
+        binary = sparse.csr_matrix(X, dtype=np.float64, copy=True)
+        binary.data[:] = 1
+        binary.eliminate_zeros()
+        return binary
+    return (np.asarray(X) != 0).astype(np.float64)
+
+
+def similarity_block(X_rows, Y, metric, Y_sizes=None):
+    """
+    Similarity between a tile of prepared rows and all prepared rows of Y
+
+    Returns:
+        Dense array of shape (n_tile_rows, n_Y_rows)
+    """
+    products = X_rows @ Y.T
+    products = products.toarray() if sparse.issparse(products) else np.asarray(products)
+
+    if metric == 'cosine':
+        return products
+
+    # Jaccard: |A & B| / |A | B| for binary rows
+    x_sizes = np.asarray(X_rows.sum(axis=1)).ravel()
+    if Y_sizes is None:
+        Y_sizes = np.asarray(Y.sum(axis=1)).ravel()
+    union = x_sizes[:, None] + Y_sizes[None, :] - products
+    similarity = np.zeros_like(products)
+    np.divide(products, union, out=similarity, where=union > 0)
+    return similarity
+
+
+def block_rows_for(n_columns, max_block_bytes=DEFAULT_MAX_BLOCK_BYTES):
+    """Rows per tile so one dense float64 tile stays under max_block_bytes"""
+    return max(1, int(max_block_bytes // (8 * max(n_columns, 1))))
+
+
+def iter_similarity_blocks(X, metric='cosine', Y=None, block_rows=None,
+                           max_block_bytes=DEFAULT_MAX_BLOCK_BYTES):
+    """
+    Yield (row_ids, similarity tile) pairs covering every row of X
+
+    Only one tile is alive at a time, so callers can apply their own
+    filtering per tile without ever holding the full matrix.
+
+    Args:
+        X: Dense array or scipy sparse matrix (one row per item)
+        metric: 'cosine' or 'jaccard'
+        Y: Rows to compare against (default: X itself)
+        block_rows: Rows per tile (default: derived from max_block_bytes)
+        max_block_bytes: Memory ceiling for one tile
+    """
+    X_prepared = prepare_features(X, metric)
+    Y_prepared = X_prepared if Y is None else prepare_features(Y, metric)
+    Y_sizes = np.asarray(Y_prepared.sum(axis=1)).ravel() if metric == 'jaccard' else None
+
+    n_rows = X_prepared.shape[0]
+    if block_rows is None:
+        block_rows = block_rows_for(Y_prepared.shape[0], max_block_bytes)
+
+    for start in range(0, n_rows, block_rows):
+        row_ids = np.arange(start, min(start + block_rows, n_rows))
+        yield row_ids, similarity_block(X_prepared[row_ids], Y_prepared, metric, Y_sizes)
+
+
+# Per-process state for pool workers, set once by _init_worker
+_worker_state = {}
+
+
+def _tile_state(X_prepared, Y_prepared, metric, k, exclude_self):
+    return {
+        'X': X_prepared, 'Y': Y_prepared, 'metric': metric, 'k': k, 'exclude_self': exclude_self,
+        'Y_sizes': np.asarray(Y_prepared.sum(axis=1)).ravel() if metric == 'jaccard' else None
+    }
+
+
+def _init_worker(*args):
+    _worker_state.update(_tile_state(*args))
+
+
+def _top_k_tile(start, end, state=None):
+    state = _worker_state if state is None else state
+    row_ids = np.arange(start, end)
+    block = similarity_block(state['X'][row_ids], state['Y'], state['metric'], state['Y_sizes'])
+    # Rows can only be excluded from their own neighbors when comparing X to itself
+    self_ids = row_ids if state['exclude_self'] else np.full(len(row_ids), block.shape[1])
+    return start, top_k_from_block(block, self_ids, state['k'])
+
+
+def print_progress(done, total):
+    """Progress callback that prints a one-line percentage"""
+    print(f"\r  similarity: {done}/{total} rows ({100 * done / max(total, 1):.0f}%)",
+          end='\n' if done >= total else '', file=sys.stderr)
+
+
+def blocked_top_k(X, k, metric='cosine', Y=None, n_jobs=1, block_rows=None,
+                  max_block_bytes=DEFAULT_MAX_BLOCK_BYTES, progress=None):
+    """
+    Top-K most similar rows of Y for every row of X, computed tile by tile
+
+    Peak memory is about n_jobs tiles of max_block_bytes plus the (n x K)
+    result, independent of the full n x n pairwise matrix.
+
+    Args:
+        X: Dense array or scipy sparse matrix (one row per item)
+        k: Neighbors kept per row
+        metric: 'cosine' or 'jaccard'
+        Y: Rows to compare against (default: X itself, excluding each row from its own list)
+        n_jobs: Worker processes (1 = compute in this process)
+        block_rows: Rows per tile (default: derived from max_block_bytes)
+        max_block_bytes: Memory ceiling for one tile
+        progress: Optional callable(done_rows, total_rows), e.g. print_progress
+
+    Returns:
+        TopKNeighbors with one sorted list per row of X
+    """
+    X_prepared = prepare_features(X, metric)
+    Y_prepared = X_prepared if Y is None else prepare_features(Y, metric)
+    exclude_self = Y is None
+
+    n_rows = X_prepared.shape[0]
+    if block_rows is None:
+        block_rows = block_rows_for(Y_prepared.shape[0], max_block_bytes)
+    tiles = [(start, min(start + block_rows, n_rows)) for start in range(0, n_rows, block_rows)]
+
+    indices = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+    done = 0
+
+    def merge(start, result):
+        nonlocal done
+        end = start + len(result[0])
+        indices[start:end], scores[start:end] = result
+        done += end - start
+        if progress is not None:
+            progress(done, n_rows)
+
+    if n_jobs is None or n_jobs <= 1 or len(tiles) <= 1:
+        state = _tile_state(X_prepared, Y_prepared, metric, k, exclude_self)
+        for start, end in tiles:
+            merge(*_top_k_tile(start, end, state))
+        return TopKNeighbors(indices, scores)
+
+    # Keep at most two tiles per worker in flight to bound memory
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(X_prepared, Y_prepared, metric, k, exclude_self)) as pool:
+        pending = set()
+        for start, end in tiles:
+            pending.add(pool.submit(_top_k_tile, start, end))
+            if len(pending) >= 2 * n_jobs:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    merge(*future.result())
+        for future in pending:
+            merge(*future.result())
+
+    return TopKNeighbors(indices, scores)
@@ -6,13 +6,64 @@ Analyzes 120 recipes from 32 world cuisines
 
 import numpy as np
 from collections import Counter
+from scipy import sparse
 from sklearn.neighbors import KNeighborsClassifier
-from sklearn.preprocessing import LabelEncoder
+from sklearn.preprocessing import LabelEncoder, normalize
 
 try:
-    from .world_recipes_data import get_world_recipes
+    from .recipe_catalog import get_world_catalog
+    from .ingredient_resolver import IngredientResolver
+    from .sparse_knn import SparseNeighborIndex
 except ImportError:
-    from world_recipes_data import get_world_recipes
+    from recipe_catalog import get_world_catalog
+    from ingredient_resolver import IngredientResolver
+    from sparse_knn import SparseNeighborIndex
+
+
+class CuisinePrototypes:
+    """
+    One prototype per cuisine: the normalized ingredient frequencies of its
+    recipes. A query is scored against every cuisine with one product, so
+    classifying costs O(#cuisines) instead of a search over all recipes.
+    """
+    
+    def __init__(self, n_examples=3):
+        """
+        Args:
+            n_examples: Example recipes cached per cuisine
+        """
+        self.n_examples = n_examples
+        self.centroids = None  # (n_cuisines x n_ingredients), unit rows
+        self.examples = []  # cuisine label -> positions of its recipes nearest the centroid
+    
+    def fit(self, X, labels, n_cuisines):
+        """
+        Compute the cuisine centroids
+        
+        Args:
+            X: Recipe x ingredient presence matrix (dense or sparse)
+            labels: Encoded cuisine of each recipe
+            n_cuisines: Number of cuisine labels
+        """
+        labels = np.asarray(labels)
+        membership = sparse.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                                       shape=(n_cuisines, len(labels)))
+        totals = membership @ X
+        totals = totals.toarray() if sparse.issparse(totals) else np.asarray(totals)
+        self.centroids = normalize(totals / np.maximum(np.bincount(labels, minlength=n_cuisines), 1)[:, None])
+        
+        # Examples: each cuisine's own recipes, most typical first (ties in recipe order)
+        recipe_scores = self.scores(X)
+        self.examples = []
+        for label in range(n_cuisines):
+            members = np.flatnonzero(labels == label)
+            order = np.lexsort((members, -recipe_scores[members, label]))
+            self.examples.append(members[order][:self.n_examples])
+        return self
+    
+    def scores(self, X):
+        """Cosine similarity of each row of X to every cuisine centroid"""
+        return np.asarray(normalize(X) @ self.centroids.T)
 
 
 class CuisineClassifier:
@@ -21,64 +72,88 @@ class CuisineClassifier:
     Based on ingredient presence vectors
     """
     
-    def __init__(self, n_neighbors=5):
+    def __init__(self, n_neighbors=5, catalog=None, neighbor_index=None, centroid_margin=None):
         """
         Initialize the cuisine classifier
         
         Args:
             n_neighbors: Number of neighbors to use for k-NN (default: 5)
+            catalog: RecipeCatalog to train on (default: the shared world catalog)
+            neighbor_index: None for scikit-learn's brute-force search over a dense
+                            feature matrix, or 'euclidean' / 'cosine' / 'jaccard'
+                            (or a SparseNeighborIndex) to search a sparse feature
+                            matrix through an inverted index
+            centroid_margin: When set, classify by the nearest cuisine centroid and
+                             fall back to the k-NN search only when the top two
+                             centroid scores are within this margin (default: None
+                             = always k-NN). Centroid predictions are on another
+                             scale than k-NN vote shares: their confidence is the
+                             share of the top-k centroid scores and their
+                             'nearest_recipes' are the cuisine's most typical
+                             recipes, so results report which 'method' ran.
         """
         self.n_neighbors = n_neighbors
+        self.catalog = catalog
+        if isinstance(neighbor_index, str):
+            neighbor_index = SparseNeighborIndex(neighbor_index)
+        self.neighbor_index = neighbor_index
+        self.centroid_margin = centroid_margin
+        self.prototypes = None
         self.model = KNeighborsClassifier(n_neighbors=n_neighbors, weights='distance')
         self.label_encoder = LabelEncoder()
         self.recipes = []
         self.ingredient_index = {}
+        self.resolver = None
         self.cuisine_labels = []
+        self.recipe_labels = None  # encoded cuisine of each training recipe
+        self.cuisine_names = []  # encoded label -> cuisine name
         
     def create_ingredient_vectors(self):
         """
         Create binary ingredient presence vectors for each recipe
-        Returns feature matrix where each row is a recipe, each column is an ingredient
+        Returns the feature matrix where each row is a recipe, each column is
+        an ingredient: sparse for a sparse neighbor index, otherwise the one
+        dense copy the k-NN model keeps
         """
-        # Get all unique ingredients
-        all_ingredients = set()
-        for recipe in self.recipes:
-            all_ingredients.update(recipe.get('ingredients', []))
+        # Sorted ingredient vocabulary (lowercased, stripped), as the catalog indexes it
+        self.ingredient_index = {ing: idx for idx, ing in enumerate(self.catalog.ingredients())}
+        self.resolver = IngredientResolver(list(self.ingredient_index))
         
-        # Create ingredient to index mapping
-        self.ingredient_index = {ing: idx for idx, ing in enumerate(sorted(all_ingredients))}
-        n_ingredients = len(self.ingredient_index)
-        n_recipes = len(self.recipes)
+        X = self.catalog.ingredient_incidence(self.ingredient_index)
+        if self.neighbor_index is not None:
+            return X
         
-        # Create feature matrix (binary: 1 if ingredient present, 0 otherwise)
-        feature_matrix = np.zeros((n_recipes, n_ingredients))
-        
-        for recipe_idx, recipe in enumerate(self.recipes):
-            for ingredient in recipe.get('ingredients', []):
-                ing_idx = self.ingredient_index.get(ingredient)
-                if ing_idx is not None:
-                    feature_matrix[recipe_idx, ing_idx] = 1
-        
-        return feature_matrix
+        # Binary feature matrix (1 if ingredient present, 0 otherwise) for k-NN
+        return X.toarray().astype(np.float64)
     
     def train(self):
         """Train the cuisine classifier on world recipes dataset"""
         print("Training Cuisine Classifier...")
         
-        # Load recipes
-        self.recipes = get_world_recipes()
+        # Load recipes from the shared catalog
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
+        self.recipes = self.catalog.recipes
         
         # Extract cuisine labels
         self.cuisine_labels = [recipe.get('cuisine', 'Unknown') for recipe in self.recipes]
         
         # Encode cuisine labels to integers
         y_encoded = self.label_encoder.fit_transform(self.cuisine_labels)
+        self.recipe_labels = y_encoded
+        self.cuisine_names = self.label_encoder.classes_.tolist()
         
         # Create feature vectors
         X = self.create_ingredient_vectors()
         
-        # Train k-NN model
-        self.model.fit(X, y_encoded)
+        # Train k-NN model (or index the sparse vectors)
+        if self.neighbor_index is not None:
+            self.neighbor_index.fit(X)
+        else:
+            self.model.fit(X, y_encoded)
+        
+        if self.centroid_margin is not None:
+            self.prototypes = CuisinePrototypes().fit(X, y_encoded, len(self.cuisine_names))
         
         # Get cuisine counts
         cuisine_counts = Counter(self.cuisine_labels)
@@ -87,7 +162,10 @@ class CuisineClassifier:
         print(f"✅ Trained on {len(self.recipes)} recipes")
         print(f"✅ {n_cuisines} different cuisines")
         print(f"✅ {len(self.ingredient_index)} unique ingredients")
-        print(f"✅ k-NN with k={self.n_neighbors} neighbors")
+        print(f"✅ k-NN with k={self.n_neighbors} neighbors"
+              + (f" (sparse {self.neighbor_index.metric} index)" if self.neighbor_index is not None else ""))
+        if self.prototypes is not None:
+            print(f"✅ Cuisine centroid fast path (k-NN fallback within margin {self.centroid_margin})")
         
         return self
     
@@ -101,61 +179,119 @@ class CuisineClassifier:
         Returns:
             Dictionary with prediction results
         """
-        if not ingredients:
-            return {
-                'success': False,
-                'error': 'No ingredients provided'
-            }
-        
-        # Create feature vector for input ingredients
-        feature_vector = np.zeros((1, len(self.ingredient_index)))
-        
-        matched_ingredients = []
-        unmatched_ingredients = []
-        
-        for ingredient in ingredients:
-            ing_lower = ingredient.lower().strip()
-            if ing_lower in self.ingredient_index:
-                ing_idx = self.ingredient_index[ing_lower]
-                feature_vector[0, ing_idx] = 1
-                matched_ingredients.append(ing_lower)
-            else:
-                unmatched_ingredients.append(ingredient)
-        
-        # Check if any ingredients matched
-        if len(matched_ingredients) == 0:
-            return {
-                'success': False,
-                'error': 'None of the ingredients are in our database',
-                'unmatched_ingredients': unmatched_ingredients
-            }
-        
-        # Predict cuisine
-        predicted_label = self.model.predict(feature_vector)[0]
-        predicted_cuisine = self.label_encoder.inverse_transform([predicted_label])[0]
-        
-        # Get prediction probabilities (based on neighbor distances)
-        probabilities = self.model.predict_proba(feature_vector)[0]
+        return self.predict_many([ingredients])[0]
+    
+    def predict_many(self, ingredient_lists, chunk_size=1000):
+        """
+        Predict cuisines for many ingredient lists
+        
+        Each chunk of lists is vectorized together and classified with a
+        single neighbor search.
+        
+        Args:
+            ingredient_lists: List of ingredient name lists
+            chunk_size: Lists classified per neighbor search
+            
+        Returns:
+            List of prediction dictionaries (as predict_cuisine), in input order
+        """
+        results = []
+        for start in range(0, len(ingredient_lists), chunk_size):
+            results.extend(self._predict_chunk(ingredient_lists[start:start + chunk_size]))
+        return results
+    
+    def _predict_chunk(self, ingredient_lists):
+        results = [None] * len(ingredient_lists)
+        matches = []  # (position, matched ids, matched names, unmatched names)
+        
+        for position, ingredients in enumerate(ingredient_lists):
+            if not ingredients:
+                results[position] = {
+                    'success': False,
+                    'error': 'No ingredients provided'
+                }
+                continue
+            
+            matched_ids = []
+            matched_ingredients = []
+            unmatched_ingredients = []
+            
+            for ingredient in ingredients:
+                # Vocabulary ids follow the sorted ingredient index
+                ing_idx = self.resolver.resolve(ingredient)
+                if ing_idx is not None:
+                    matched_ids.append(ing_idx)
+                    matched_ingredients.append(self.resolver.terms[ing_idx])
+                else:
+                    unmatched_ingredients.append(ingredient)
+            
+            # Check if any ingredients matched
+            if len(matched_ingredients) == 0:
+                results[position] = {
+                    'success': False,
+                    'error': 'None of the ingredients are in our database',
+                    'unmatched_ingredients': unmatched_ingredients
+                }
+                continue
+            
+            matches.append((position, matched_ids, matched_ingredients, unmatched_ingredients))
+        
+        if not matches:
+            return results
+        
+        feature_vectors = self._vectorize([matched_ids for _, matched_ids, _, _ in matches])
+        probabilities = np.zeros((len(matches), len(self.cuisine_names)))
+        examples = [None] * len(matches)
+        methods = ['knn'] * len(matches)
+        
+        # Centroid fast path: keep the rows whose best cuisine clearly beats the runner-up
+        knn_rows = np.arange(len(matches))
+        if self.prototypes is not None:
+            scores = self.prototypes.scores(feature_vectors)
+            best_two = np.sort(scores, axis=1)[:, -2:]
+            clear = best_two[:, -1] - best_two[:, 0] > self.centroid_margin
+            for row in np.flatnonzero(clear):
+                probabilities[row] = self._centroid_probabilities(scores[row])
+                examples[row] = self.prototypes.examples[int(np.argmax(scores[row]))]
+                methods[row] = 'centroid'
+            knn_rows = np.flatnonzero(~clear)
+        
+        # One neighbor search gives the labels, the probabilities and the examples of the rest
+        if len(knn_rows):
+            distances, indices = self._kneighbors(feature_vectors[knn_rows])
+            probabilities[knn_rows] = self._neighbor_probabilities(distances, indices)
+            for row, neighbors in zip(knn_rows, indices):
+                examples[row] = neighbors
+        
+        for row, (position, _, matched_ingredients, unmatched_ingredients) in enumerate(matches):
+            results[position] = self._format_prediction(
+                probabilities[row], examples[row], matched_ingredients, unmatched_ingredients,
+                len(ingredient_lists[position])
+            )
+            results[position]['method'] = methods[row]
+        return results
+    
+    def _format_prediction(self, probabilities, neighbor_indices, matched_ingredients,
+                           unmatched_ingredients, total_ingredients):
+        """Prediction dictionary of one query from its cuisine probabilities and neighbors"""
+        predicted_label = int(np.argmax(probabilities))
+        predicted_cuisine = self.cuisine_names[predicted_label]
         
         # Get top 3 predictions
         top_indices = np.argsort(probabilities)[::-1][:3]
         top_predictions = []
         
         for idx in top_indices:
-            cuisine = self.label_encoder.inverse_transform([idx])[0]
             probability = probabilities[idx]
             if probability > 0:
                 top_predictions.append({
-                    'cuisine': cuisine,
+                    'cuisine': self.cuisine_names[idx],
                     'probability': float(probability),
                     'percentage': float(probability * 100)
                 })
         
-        # Get k nearest recipes as examples
-        distances, indices = self.model.kneighbors(feature_vector)
-        
         nearest_recipes = []
-        for idx in indices[0][:3]:  # Top 3 nearest
+        for idx in neighbor_indices[:3]:  # Top 3 nearest
             recipe = self.recipes[idx]
             nearest_recipes.append({
                 'name': recipe.get('name'),
@@ -170,12 +306,73 @@ class CuisineClassifier:
             'top_predictions': top_predictions,
             'matched_ingredients': matched_ingredients,
             'unmatched_ingredients': unmatched_ingredients,
-            'total_ingredients': len(ingredients),
+            'total_ingredients': total_ingredients,
             'matched_count': len(matched_ingredients),
             'nearest_recipes': nearest_recipes,
             'k_neighbors': self.n_neighbors
         }
     
+    def _vectorize(self, id_lists):
+        """
+        Binary feature rows for lists of ingredient ids
+        
+        Returns:
+            CSR matrix for a sparse neighbor index, dense float64 array otherwise
+        """
+        id_lists = [sorted(set(ids)) for ids in id_lists]
+        indptr = np.cumsum([0] + [len(ids) for ids in id_lists])
+        indices = np.array([idx for ids in id_lists for idx in ids], dtype=np.int64)
+        X = sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                              shape=(len(id_lists), len(self.ingredient_index)))
+        return X if self.neighbor_index is not None else X.toarray()
+    
+    def _kneighbors(self, X):
+        """
+        Distances and indices of the k nearest training recipes of each row,
+        nearest first with ties in recipe order (so batches match single queries)
+        """
+        if self.neighbor_index is not None:
+            return self.neighbor_index.kneighbors(X, self.n_neighbors)
+        
+        distances, indices = self.model.kneighbors(X)
+        order = np.lexsort((indices, distances), axis=1)
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+    
+    def _centroid_probabilities(self, scores):
+        """
+        Cuisine probabilities from centroid scores: like the k-NN, where at most
+        k cuisines receive votes, the k best cuisines share the probability
+        in proportion to their scores
+        """
+        top = np.argsort(scores)[::-1][:self.n_neighbors]
+        probabilities = np.zeros(len(scores))
+        probabilities[top] = scores[top] / scores[top].sum()
+        return probabilities
+    
+    def _neighbor_probabilities(self, distances, indices):
+        """
+        Distance-weighted cuisine probabilities from a kneighbors result
+        
+        Each neighbor votes for its cuisine with weight 1/distance; when a query
+        has exact matches (distance 0) only those vote, as in KNeighborsClassifier.
+        
+        Returns:
+            Array of shape (n_queries, n_cuisines)
+        """
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / distances
+        exact = np.isinf(weights)
+        exact_rows = exact.any(axis=1)
+        weights[exact_rows] = exact[exact_rows]
+        
+        votes = np.zeros((len(indices), len(self.cuisine_names)))
+        rows = np.repeat(np.arange(len(indices)), indices.shape[1])
+        np.add.at(votes, (rows, self.recipe_labels[indices].ravel()), weights.ravel())
+        
+        totals = votes.sum(axis=1)
+        totals[totals == 0] = 1
+        return votes / totals[:, None]
+    
     def get_cuisine_stats(self):
         """Get statistics about cuisines in the dataset"""
         cuisine_counts = Counter(self.cuisine_labels)
@@ -23,6 +23,8 @@ class IngredientClusterer:
         self.scaler = StandardScaler()
         self.ingredient_names = []
         self.feature_names = ['protein', 'carbs', 'fat', 'calories', 'fiber']
+        self.clusters = {}  # cluster_id -> ingredient names, built once after training
+        self.cluster_names = {}  # cluster_id -> descriptive name
         
     def create_sample_data(self):
         """
@@ -91,6 +93,7 @@ class IngredientClusterer:
         
         # Fit k-means
         self.kmeans.fit(X_scaled)
+        self._build_cluster_views()
         
         return self
     
@@ -104,61 +107,80 @@ class IngredientClusterer:
         Returns:
             Cluster label (int)
         """
-        X = np.array([ingredient_features])
+        return self.predict_many([ingredient_features])[0]
+    
+    def predict_many(self, feature_rows):
+        """
+        Predict clusters for many ingredients with one transform and predict call
+        
+        Args:
+            feature_rows: List of feature lists (protein, carbs, fat, calories, fiber)
+        
+        Returns:
+            List of cluster labels (int), in input order
+        
+        Raises:
+            ValueError: If a row does not have one value per feature
+        """
+        X = np.array(feature_rows, dtype=float)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Each ingredient needs {len(self.feature_names)} features: "
+                             f"{', '.join(self.feature_names)}")
+        
         X_scaled = self.scaler.transform(X)
-        return int(self.kmeans.predict(X_scaled)[0])
+        return self.kmeans.predict(X_scaled).tolist()
+    
+    def _build_cluster_views(self):
+        """Group the training ingredients by cluster and name each cluster"""
+        self.clusters = {}
+        for idx, label in enumerate(self.kmeans.labels_):
+            self.clusters.setdefault(int(label), []).append(self.ingredient_names[idx])
+        
+        self.cluster_names = {cluster_id: self._name_cluster(cluster_id, ingredients)
+                              for cluster_id, ingredients in self.clusters.items()}
+    
+    def _name_cluster(self, cluster_id, ingredients):
+        """Descriptive name of a cluster based on its ingredients (simple heuristic)"""
+        ingredients_lower = [ing.lower() for ing in ingredients]
+        
+        if any(protein in ingredients_lower for protein in ['chicken', 'beef', 'salmon', 'eggs', 'tofu']):
+            return "Protein-Rich Foods"
+        elif any(carb in ingredients_lower for carb in ['rice', 'pasta', 'bread', 'quinoa', 'oats']):
+            return "Grains & Carbohydrates"
+        elif any(veg in ingredients_lower for veg in ['broccoli', 'spinach', 'carrots', 'tomatoes', 'pepper']):
+            return "Vegetables"
+        elif any(dairy in ingredients_lower for dairy in ['milk', 'cheese', 'yogurt', 'butter']):
+            return "Dairy Products"
+        elif any(fat in ingredients_lower for fat in ['oil', 'avocado', 'almonds', 'peanut']):
+            return "Healthy Fats & Nuts"
+        elif any(fruit in ingredients_lower for fruit in ['banana', 'apple', 'orange', 'strawberries']):
+            return "Fruits"
+        return f"Cluster {cluster_id}"
     
     def get_clusters(self):
         """
         Get all ingredients organized by cluster
         
         Returns:
-            Dict mapping cluster_id to list of ingredients
+            Dict mapping cluster_id to list of ingredients (a copy; the
+            cached view is shared by every caller)
         """
         if not self.ingredient_names:
             raise ValueError("Model not trained yet")
         
-        clusters = {}
-        labels = self.kmeans.labels_
-        
-        for idx, label in enumerate(labels):
-            label = int(label)
-            if label not in clusters:
-                clusters[label] = []
-            clusters[label].append(self.ingredient_names[idx])
-        
-        return clusters
+        return {cluster_id: list(ingredients) for cluster_id, ingredients in self.clusters.items()}
     
     def get_cluster_names(self):
         """
         Get descriptive names for each cluster based on ingredients
         
         Returns:
-            Dict mapping cluster_id to cluster name
+            Dict mapping cluster_id to cluster name (a copy)
         """
-        clusters = self.get_clusters()
-        cluster_names = {}
+        if not self.ingredient_names:
+            raise ValueError("Model not trained yet")
         
-        # Simple heuristic based on common ingredients
-        for cluster_id, ingredients in clusters.items():
-            ingredients_lower = [ing.lower() for ing in ingredients]
-            
-            if any(protein in ingredients_lower for protein in ['chicken', 'beef', 'salmon', 'eggs', 'tofu']):
-                cluster_names[cluster_id] = "Protein-Rich Foods"
-            elif any(carb in ingredients_lower for carb in ['rice', 'pasta', 'bread', 'quinoa', 'oats']):
-                cluster_names[cluster_id] = "Grains & Carbohydrates"
-            elif any(veg in ingredients_lower for veg in ['broccoli', 'spinach', 'carrots', 'tomatoes', 'pepper']):
-                cluster_names[cluster_id] = "Vegetables"
-            elif any(dairy in ingredients_lower for dairy in ['milk', 'cheese', 'yogurt', 'butter']):
-                cluster_names[cluster_id] = "Dairy Products"
-            elif any(fat in ingredients_lower for fat in ['oil', 'avocado', 'almonds', 'peanut']):
-                cluster_names[cluster_id] = "Healthy Fats & Nuts"
-            elif any(fruit in ingredients_lower for fruit in ['banana', 'apple', 'orange', 'strawberries']):
-                cluster_names[cluster_id] = "Fruits"
-            else:
-                cluster_names[cluster_id] = f"Cluster {cluster_id}"
-        
-        return cluster_names
+        return dict(self.cluster_names)
     
     def save(self, filepath):
         """Save the trained model"""
@@ -177,6 +199,7 @@ class IngredientClusterer:
         self.scaler = model_data['scaler']
         self.ingredient_names = model_data['ingredient_names']
         self.n_clusters = model_data['n_clusters']
+        self._build_cluster_views()
         return self
 
 
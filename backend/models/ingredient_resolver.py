@@ -0,0 +1,189 @@
+"""
+Ingredient Name Resolver
+Maps free-text ingredient names to canonical vocabulary ids with an
+Aho-Corasick automaton and a suffix trie over words, so resolving a name
+costs time proportional to its length rather than to the vocabulary size
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def words(name):
+    """
+    Words of a name, with plurals folded ('tomatoes' -> 'tomato',
+    'berries' -> 'berry', 'eggs' -> 'egg') so both forms match each other
+    """
+    folded = []
+    for word in _WORD.findall(name.lower()):
+        if word.endswith('ies') and len(word) > 4:
+            word = word[:-3] + 'y'
+        elif word.endswith('oes') and len(word) > 4:
+            word = word[:-2]
+        elif word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+            word = word[:-1]
+        folded.append(word)
+    return tuple(folded)
+
+
+class IngredientResolver:
+    """
+    Resolves an ingredient name to one vocabulary term, trying in order:
+      1. the exact term (ignoring case, punctuation and plurals)
+      2. the longest term whose words appear in the name ('chicken breast' -> 'chicken')
+      3. the shortest term ending with the name's words ('beans' -> 'black beans',
+         but not 'olive' -> 'olive oil')
+    Matches are made on whole words only, so 'ham' does not resolve to
+    'béchamel sauce' nor 'ice' to 'rice'. Ties go to the term that comes
+    first in the vocabulary.
+    """
+
+    def __init__(self, vocabulary, cache_size=4096):
+        """
+        Initialize the resolver
+
+        Args:
+            vocabulary: List of canonical ingredient names (id = position)
+            cache_size: Number of resolved names kept in the LRU cache
+        """
+        self.terms = [term.lower().strip() for term in vocabulary]
+        self.term_ids = {}
+        self.term_words = {}  # folded words -> first term id spelling them
+        for term_id, term in enumerate(self.terms):
+            self.term_ids.setdefault(term, term_id)
+            self.term_words.setdefault(words(term), term_id)
+        self.cache_size = cache_size
+
+        self._build_automaton()
+        self._build_suffix_trie()
+        self._init_cache()
+
+    def _build_automaton(self):
+        """Aho-Corasick automaton over words: finds every term occurring inside a name in one pass"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # longest term ending at this state (via failure links too)
+
+        for term_id, term_words in self._unique_terms():
+            state = 0
+            for word in term_words:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._best[state] = term_id
+
+        # Breadth-first: failure link = longest proper suffix that is also a prefix
+        # (children of the root fail to the root, which the defaults already say)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._best[child] = self._longer(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def _build_suffix_trie(self):
+        """Trie of the word suffixes of every term: a walk spells the last words of terms"""
+        self._suffix_trie = {}
+        for term_id, term_words in self._unique_terms():
+            for start in range(len(term_words)):
+                node = self._suffix_trie
+                for word in term_words[start:]:
+                    node = node.setdefault(word, {})
+                # Shortest term ending with these words
+                node[None] = self._shorter(node.get(None), term_id)
+
+    def _unique_terms(self):
+        return ((term_id, term_words) for term_words, term_id in self.term_words.items() if term_words)
+
+    def _longer(self, first, second):
+        if first is None or second is None:
+            return second if first is None else first
+        length_first, length_second = len(self.terms[first]), len(self.terms[second])
+        if length_first != length_second:
+            return first if length_first > length_second else second
+        return min(first, second)
+
+    def _shorter(self, first, second):
+        if first is None or second is None:
+            return second if first is None else first
+        length_first, length_second = len(self.terms[first]), len(self.terms[second])
+        if length_first != length_second:
+            return first if length_first < length_second else second
+        return min(first, second)
+
+    def _init_cache(self):
+        self._cached_resolve = lru_cache(maxsize=self.cache_size)(self._resolve)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_cached_resolve']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_cache()
+
+    def _resolve(self, name):
+        if not name:
+            return None
+
+        # 1. Exact term
+        term_id = self.term_ids.get(name)
+        if term_id is None:
+            term_id = self.term_words.get(words(name))
+        if term_id is not None:
+            return term_id
+
+        # 2. Longest term whose words all appear, in order, in the name
+        name_words = words(name)
+        state, best = 0, None
+        for word in name_words:
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            best = self._longer(best, self._best[state])
+        if best is not None:
+            return best
+
+        # 3. Shortest term ending with the name's words
+        node = self._suffix_trie
+        for word in name_words:
+            node = node.get(word)
+            if node is None:
+                return None
+        return node.get(None)
+
+    def resolve(self, name):
+        """
+        Vocabulary id of an ingredient name
+
+        Returns:
+            Term id, or None when no term matches
+        """
+        return self._cached_resolve(name.lower().strip())
+
+    def resolve_term(self, name):
+        """Canonical vocabulary term of an ingredient name (None when no term matches)"""
+        term_id = self.resolve(name)
+        return None if term_id is None else self.terms[term_id]
+
+    def cache_info(self):
+        """Hit / miss statistics of the resolution cache"""
+        return self._cached_resolve.cache_info()
+
+
+if __name__ == '__main__':
+    resolver = IngredientResolver(['chicken', 'chicken broth', 'rice', 'olive oil', 'oil', 'soy sauce'])
+    for name in ['Chicken', 'boneless chicken breast', 'extra virgin olive oil', 'broth', 'ice', 'saffron']:
+        print(f"{name!r:28} -> {resolver.resolve_term(name)!r}")
@@ -0,0 +1,106 @@
+"""
+Ingredient Search Engine
+Finds the recipes that use the most of a set of available ingredients with
+ingredient -> recipe posting lists, so a query only touches recipes that
+share at least one ingredient with it
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+try:
+    from .bitsets import IngredientBitsets, coverage, has_bits
+except ImportError:
+    from bitsets import IngredientBitsets, coverage, has_bits
+
+
+def _top_positions(scores, candidates, top_n):
+    """
+    Indices of the top_n scores, by descending score then ascending candidate
+
+    Only the scores reaching the top_n-th best are sorted; the cut itself is
+    found with a partition, so a broad query does not sort every candidate.
+    """
+    top_n = max(top_n, 0)
+    keep = np.arange(len(scores))
+    if top_n < len(scores):
+        cut = -np.partition(-scores, top_n - 1)[top_n - 1] if top_n else np.inf
+        # Everything tied with the cut stays so the candidate tie-break decides
+        keep = np.flatnonzero(scores >= cut)
+    order = np.lexsort((candidates[keep], -scores[keep]))[:top_n]
+    return keep[order]
+
+
+class IngredientSearchEngine:
+    """
+    Pantry search over a RecipeCatalog
+
+    A recipe's score is the fraction of its ingredients found in the query.
+    """
+
+    def __init__(self, catalog):
+        """
+        Initialize the search engine
+
+        Args:
+            catalog: RecipeCatalog to search
+        """
+        self.catalog = catalog
+        self.postings = {}  # normalized (lowercased, stripped) ingredient -> catalog positions
+        self.bitsets = None  # packed ingredient set of each recipe, by catalog position
+        self.version = None
+        self.build()
+
+    def build(self):
+        """Build the posting lists and ingredient bitsets from the catalog"""
+        self.bitsets = IngredientBitsets.from_recipes(self.catalog.recipes)
+
+        postings = defaultdict(list)
+        for position, recipe in enumerate(self.catalog.recipes):
+            for ingredient in set(ing.lower().strip() for ing in recipe.get('ingredients', [])):
+                postings[ingredient].append(position)
+        self.postings = {ingredient: np.array(ids) for ingredient, ids in postings.items()}
+        self.version = self.catalog.version
+        return self
+
+    def search(self, ingredients, top_n=10):
+        """
+        Rank recipes by how much of them the given ingredients cover
+
+        Args:
+            ingredients: List of available ingredient names
+            top_n: Number of recipes to return
+
+        Returns:
+            Tuple of (results, total_matches). results holds up to top_n dicts
+            with 'recipe', 'matched_ingredients', 'overlap_score' and
+            'total_ingredients', sorted by descending score (ties keep catalog
+            order); total_matches counts every recipe sharing an ingredient.
+        """
+        if self.version != self.catalog.version:
+            self.build()
+
+        query = [ing for ing in dict.fromkeys(ing.lower().strip() for ing in ingredients)
+                 if ing in self.postings]
+        if not query:
+            return [], 0
+
+        # Candidates from the postings, scored with the bitset coverage kernel
+        candidates = np.unique(np.concatenate([self.postings[ing] for ing in query]))
+        query_bits, _ = self.bitsets.encode(query)
+        scores = coverage(query_bits, self.bitsets.bits[candidates], self.bitsets.sizes[candidates])
+
+        top = _top_positions(scores, candidates, top_n)
+        positions = candidates[top]
+        query_positions = [self.bitsets.vocabulary[ing] for ing in query]
+        matched = has_bits(self.bitsets.bits[positions], query_positions)
+
+        results = [{
+            'recipe': self.catalog.recipes[position],
+            'matched_ingredients': [ing for ing, hit in zip(query, row_matched) if hit],
+            'overlap_score': float(score),
+            'total_ingredients': int(self.bitsets.sizes[position])
+        } for position, score, row_matched in zip(positions, scores[top], matched)]
+
+        return results, len(candidates)
@@ -1,14 +1,19 @@
 """
 Feature #3: Ingredient Substitution Finder
-Uses Association Rules (Apriori-like) to find ingredient substitutions
-Based on co-occurrence patterns in recipes
+Uses Association Rules to find ingredient substitutions
+Based on co-occurrence patterns in recipes, ranked in the context of a
+recipe with FP-Growth association rules
 Dataset: 120+ recipes from 15+ world cuisines with 200+ ingredients
 """
 
 import numpy as np
-from collections import defaultdict
 import json
-from .world_recipes_data import get_world_recipes, get_ingredient_categories
+from .world_recipes_data import get_ingredient_categories
+from .recipe_catalog import get_world_catalog
+from .ingredient_resolver import IngredientResolver
+from .blocked_similarity import iter_similarity_blocks
+from .itemset_mining import ItemsetMiner
+from .substitution_store import SubstitutionRuleStore
 
 
 class IngredientSubstitutionFinder:
@@ -17,28 +22,38 @@ class IngredientSubstitutionFinder:
     Based on ingredient co-occurrence in recipes
     """
     
-    def __init__(self, min_support=0.02, min_confidence=0.15):
+    def __init__(self, min_support=0.02, min_confidence=0.15, catalog=None, max_substitutes=None):
         """
         Initialize the substitution finder
         
         Args:
             min_support: Minimum support threshold for frequent itemsets (lowered to 0.02 for maximum coverage)
             min_confidence: Minimum confidence for substitution rules (lowered to 0.15 for maximum coverage)
+            catalog: RecipeCatalog to learn from (default: the shared world catalog)
+            max_substitutes: Keep only this many best substitutes per ingredient
+                             (default: None = every substitute passing the thresholds)
         """
         self.min_support = min_support
         self.min_confidence = min_confidence
+        self.catalog = catalog
+        self.max_substitutes = max_substitutes
         self.recipes = []
         self.ingredient_index = {}  # ingredient -> index mapping
-        self.substitution_rules = {}  # ingredient -> list of (substitute, confidence, support)
+        self.substitution_rules = None  # SubstitutionRuleStore: ingredient -> sorted substitutes
         self.ingredient_categories = {}  # ingredient -> category mapping
+        self.resolver = None  # free-text name -> ingredient with rules
+        self.context_resolver = None  # free-text name -> any known ingredient
+        self.itemset_miner = None  # FP-Growth itemsets and association rules
         
     def create_sample_recipe_data(self):
         """
         Load comprehensive world recipe dataset with 120+ recipes
         Covers 15+ cuisines from around the world with 260+ ingredients
         """
-        # Load the comprehensive world recipes dataset
-        self.recipes = get_world_recipes()
+        # Use the shared world recipes catalog
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
+        self.recipes = self.catalog.recipes
         
         # Load ingredient categories for intelligent substitutions
         self.ingredient_categories = get_ingredient_categories()
@@ -47,30 +62,13 @@ class IngredientSubstitutionFinder:
         """
         Calculate co-occurrence matrix for ingredients
         Shows how often ingredients appear together
+        
+        Returns:
+            Tuple of (sparse integer co-occurrence matrix, recipe count of each ingredient),
+            both shared with other models through the catalog
         """
-        # Build ingredient index
-        all_ingredients = set()
-        for recipe in self.recipes:
-            all_ingredients.update(recipe['ingredients'])
-        
-        self.ingredient_index = {ing: idx for idx, ing in enumerate(sorted(all_ingredients))}
-        n_ingredients = len(self.ingredient_index)
-        
-        # Co-occurrence matrix
-        cooccurrence = np.zeros((n_ingredients, n_ingredients))
-        ingredient_counts = np.zeros(n_ingredients)
-        
-        # Count co-occurrences
-        for recipe in self.recipes:
-            ingredients = recipe['ingredients']
-            for ing in ingredients:
-                idx = self.ingredient_index[ing]
-                ingredient_counts[idx] += 1
-                
-                for other_ing in ingredients:
-                    if ing != other_ing:
-                        other_idx = self.ingredient_index[other_ing]
-                        cooccurrence[idx][other_idx] += 1
+        vocabulary, cooccurrence, ingredient_counts = self.catalog.ingredient_cooccurrence()
+        self.ingredient_index = {ing: idx for idx, ing in enumerate(vocabulary)}
         
         return cooccurrence, ingredient_counts
     
@@ -81,49 +79,73 @@ class IngredientSubstitutionFinder:
         """
         cooccurrence, ingredient_counts = self.calculate_ingredient_cooccurrence()
         n_recipes = len(self.recipes)
-        reverse_index = {idx: ing for ing, idx in self.ingredient_index.items()}
-        
-        self.substitution_rules = defaultdict(list)
-        
-        # For each ingredient pair, calculate substitution confidence
-        for ing1, idx1 in self.ingredient_index.items():
-            for ing2, idx2 in self.ingredient_index.items():
-                if ing1 == ing2:
-                    continue
-                
-                # Check if they're in the same category
-                cat1 = self.ingredient_categories.get(ing1, 'other')
-                cat2 = self.ingredient_categories.get(ing2, 'other')
-                
-                # Only consider substitutions within similar categories
-                if not self._is_substitutable_category(cat1, cat2):
-                    continue
-                
-                # Calculate support: how often they appear in similar contexts
-                # (both appear in recipes, but not necessarily together)
-                support1 = ingredient_counts[idx1] / n_recipes
-                support2 = ingredient_counts[idx2] / n_recipes
-                
-                if support1 < self.min_support or support2 < self.min_support:
-                    continue
-                
-                # Calculate confidence: probability of substitution
-                # Based on how often they appear in similar recipe contexts
-                shared_context_score = self._calculate_context_similarity(
-                    ing1, ing2, cooccurrence, idx1, idx2
-                )
-                
-                if shared_context_score >= self.min_confidence:
-                    self.substitution_rules[ing1].append({
-                        'substitute': ing2,
-                        'confidence': round(shared_context_score, 3),
-                        'support': round(min(support1, support2), 3),
-                        'category': cat2
-                    })
-        
-        # Sort substitutes by confidence
-        for ing in self.substitution_rules:
-            self.substitution_rules[ing].sort(key=lambda x: x['confidence'], reverse=True)
+        ingredients = sorted(self.ingredient_index, key=self.ingredient_index.get)
+        
+        # Category compatibility is decided once per pair of categories,
+        # then looked up per ingredient pair through each ingredient's category id
+        categories = [self.ingredient_categories.get(ing, 'other') for ing in ingredients]
+        category_names = sorted(set(categories))
+        category_lookup = {cat: cat_id for cat_id, cat in enumerate(category_names)}
+        category_ids = np.array([category_lookup[cat] for cat in categories], dtype=int)
+        compatible = np.array([
+            [self._is_substitutable_category(cat1, cat2) for cat2 in category_names]
+            for cat1 in category_names
+        ], dtype=bool)
+        
+        # Support: how often each ingredient appears across recipes
+        support = ingredient_counts / n_recipes
+        frequent = support >= self.min_support
+        
+        rows = []
+        
+        # Context similarity (cosine of row-normalized co-occurrence rows) comes
+        # one tile of ingredients at a time from a single matrix product, and
+        # all pair filters are applied to the whole tile as boolean masks
+        for row_ids, context_similarity in iter_similarity_blocks(cooccurrence, metric='cosine'):
+            candidates = (
+                compatible[category_ids[row_ids]][:, category_ids]
+                & frequent[row_ids, None] & frequent[None, :]
+                & (context_similarity >= self.min_confidence)
+            )
+            candidates[np.arange(len(row_ids)), row_ids] = False
+            
+            rows.extend(self._rank_substitutes(row_ids, context_similarity, candidates, support))
+        
+        self.substitution_rules = SubstitutionRuleStore.from_rows(ingredients, category_names, category_ids, rows)
+    
+    def _rank_substitutes(self, row_ids, scores, candidates, support):
+        """
+        Ranked substitutes of every ingredient of one similarity tile
+        
+        All candidate pairs of the tile are ordered with one lexsort, by
+        ingredient, then rounded confidence (descending), then substitute
+        index; max_substitutes then keeps the first ones of each ingredient.
+        
+        Returns:
+            List of (ingredient id, substitute ids, confidences, supports) rows
+        """
+        tile_rows, substitutes = np.nonzero(candidates)
+        if len(tile_rows) == 0:
+            return []
+        confidences = np.round(scores[tile_rows, substitutes], 3)
+        order = np.lexsort((substitutes, -confidences, tile_rows))
+        tile_rows, substitutes, confidences = tile_rows[order], substitutes[order], confidences[order]
+        
+        # Each ingredient's substitutes are a contiguous run after the sort
+        row_starts = np.flatnonzero(np.diff(tile_rows, prepend=-1))
+        if self.max_substitutes is not None:
+            ranks = np.arange(len(tile_rows)) - np.repeat(row_starts, np.diff(np.append(row_starts, len(tile_rows))))
+            keep = ranks < self.max_substitutes
+            tile_rows, substitutes, confidences = tile_rows[keep], substitutes[keep], confidences[keep]
+            row_starts = np.flatnonzero(np.diff(tile_rows, prepend=-1))
+        
+        ingredient_ids = np.asarray(row_ids)[tile_rows]
+        supports = np.round(np.minimum(support[ingredient_ids], support[substitutes]), 3)
+        bounds = np.append(row_starts, len(tile_rows))
+        return [
+            (int(ingredient_ids[start]), substitutes[start:end], confidences[start:end], supports[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
     
     def _is_substitutable_category(self, cat1, cat2):
         """Check if two categories are substitutable - RELAXED for more results"""
@@ -165,26 +187,6 @@ class IngredientSubstitutionFinder:
         
         return False
     
-    def _calculate_context_similarity(self, ing1, ing2, cooccurrence, idx1, idx2):
-        """
-        Calculate how similar the contexts are for two ingredients
-        Based on their co-occurrence patterns with other ingredients
-        """
-        # Get co-occurrence vectors
-        vec1 = cooccurrence[idx1]
-        vec2 = cooccurrence[idx2]
-        
-        # Calculate cosine similarity of contexts
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        similarity = dot_product / (norm1 * norm2)
-        return similarity
-    
     def train(self):
         """Train the substitution finder"""
         print("Training Ingredient Substitution Finder...")
@@ -194,40 +196,71 @@ class IngredientSubstitutionFinder:
         
         # Find substitution rules
         self.find_substitution_pairs()
+        self.resolver = IngredientResolver(self.substitution_rules.sources())
+        self.context_resolver = IngredientResolver(list(self.ingredient_index))
+        
+        # Association rules over recipe transactions, used to rank substitutes in context
+        self.itemset_miner = ItemsetMiner(min_support=self.min_support, min_confidence=self.min_confidence)
+        self.itemset_miner.fit(lambda: ([ing.lower().strip() for ing in recipe['ingredients']]
+                                        for recipe in self.recipes))
         
         print(f"✅ Found substitution rules for {len(self.substitution_rules)} ingredients")
+        print(f"✅ Mined {len(self.itemset_miner.itemsets)} frequent itemsets, "
+              f"{len(self.itemset_miner.rules)} association rules")
         print(f"✅ Total recipes analyzed: {len(self.recipes)}")
         
         return self
     
-    def get_substitutes(self, ingredient, top_n=5):
+    def get_substitutes(self, ingredient, top_n=5, context=None):
         """
         Get substitute ingredients for a given ingredient
         
         Args:
             ingredient: Ingredient name (lowercase)
             top_n: Number of substitutes to return
+            context: Optional list of the other ingredients of the recipe; substitutes
+                     are then ranked by the association rules that predict them
+                     from those ingredients
         
         Returns:
             List of substitute dictionaries with confidence scores
         """
-        ingredient = ingredient.lower().strip()
+        # Exact or closest partial match among ingredients with rules
+        ingredient = self.resolver.resolve_term(ingredient)
+        if ingredient is None:
+            return []
         
-        if ingredient not in self.substitution_rules:
-            # Try to find partial matches
-            possible_matches = [
-                ing for ing in self.substitution_rules.keys()
-                if ingredient in ing or ing in ingredient
-            ]
-            
-            if not possible_matches:
-                return []
-            
-            # Use the closest match
-            ingredient = possible_matches[0]
+        if not context:
+            return self.substitution_rules.get(ingredient, top_n)
         
-        substitutes = self.substitution_rules[ingredient][:top_n]
-        return substitutes
+        substitutes = self.substitution_rules.get(ingredient)
+        return self._rank_in_context(ingredient, substitutes, context)[:top_n]
+    
+    def _rank_in_context(self, ingredient, substitutes, context):
+        """
+        Order substitutes by the confidence of the best rule antecedent -> substitute
+        whose antecedent is part of the context (substitutes already in it are dropped)
+        """
+        context_terms = set(self.context_resolver.resolve_term(name) for name in context)
+        context_terms -= {None, ingredient}
+        
+        ranked = []
+        for position, substitute in enumerate(substitutes):
+            if substitute['substitute'] in context_terms:
+                continue
+            rule = self.itemset_miner.best_rule(substitute['substitute'], context_terms)
+            ranked.append((-(rule['confidence'] if rule else 0.0), position, dict(substitute,
+                context=list(rule['antecedent']) if rule else [],
+                context_confidence=round(rule['confidence'], 3) if rule else 0.0,
+                context_lift=round(rule['lift'], 3) if rule else 0.0
+            )))
+        
+        ranked.sort(key=lambda item: item[:2])
+        return [substitute for _, _, substitute in ranked]
+    
+    def get_ingredients_with_substitutes(self):
+        """Get sorted list of ingredients that have substitution rules"""
+        return sorted(self.substitution_rules.sources())
     
     def get_all_ingredients(self):
         """Get list of all known ingredients"""
@@ -241,10 +274,7 @@ class IngredientSubstitutionFinder:
             return None
         
         # Count recipes containing this ingredient
-        recipe_count = sum(
-            1 for recipe in self.recipes
-            if ingredient in recipe['ingredients']
-        )
+        recipe_count = len(self.catalog.ids_with_ingredient(ingredient))
         
         return {
             'ingredient': ingredient,
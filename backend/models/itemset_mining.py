@@ -0,0 +1,340 @@
+"""
+Frequent Itemset Mining
+FP-Growth over recipe transactions (each recipe's set of ingredients) and
+association rules derived from the frequent itemsets. Transactions are read
+in chunks, so the catalog never has to exist as a one-hot matrix, and the
+FP-tree only grows with the number of distinct frequent-item paths.
+"""
+
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, islice
+
+import joblib
+
+
+class _FPNode:
+    __slots__ = ('item', 'count', 'parent', 'children', 'link')
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+        self.link = None  # next node holding the same item
+
+
+class FPTree:
+    """
+    Prefix tree of transactions whose items are sorted by descending frequency
+
+    Items are integer ranks (0 = most frequent); the header links every node
+    of an item so its conditional pattern base can be walked directly.
+    """
+
+    def __init__(self):
+        self.root = _FPNode(None, None)
+        self.header = {}  # item -> first node in the item's node chain
+        self.item_counts = defaultdict(int)
+
+    def insert(self, items, count=1):
+        """Add a transaction (items in ascending rank order) seen count times"""
+        node = self.root
+        for item in items:
+            child = node.children.get(item)
+            if child is None:
+                child = _FPNode(item, node)
+                child.link = self.header.get(item)
+                node.children[item] = child
+                self.header[item] = child
+            child.count += count
+            self.item_counts[item] += count
+            node = child
+
+    def prefix_paths(self, item):
+        """Conditional pattern base of an item: (path to the root, count) pairs"""
+        node = self.header.get(item)
+        while node is not None:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                yield path[::-1], node.count
+            node = node.link
+
+    @classmethod
+    def conditional(cls, paths, min_count):
+        """FP-tree of a conditional pattern base, keeping only its frequent items"""
+        counts = defaultdict(int)
+        for path, count in paths:
+            for item in path:
+                counts[item] += count
+
+        tree = cls()
+        for path, count in paths:
+            frequent = [item for item in path if counts[item] >= min_count]
+            if frequent:
+                tree.insert(frequent, count)
+        return tree
+
+
+def _chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _passes(transactions):
+    """A fresh iterator over the transactions for every call (lists or factories)"""
+    return transactions() if callable(transactions) else iter(transactions)
+
+
+def min_count_for(min_support, n_transactions):
+    """Smallest transaction count whose support is >= min_support"""
+    return max(1, math.ceil(round(min_support * n_transactions, 9)))
+
+
+def fp_growth(transactions, min_support, max_len=None, chunk_size=10000):
+    """
+    Mine frequent itemsets with FP-Growth
+
+    Args:
+        transactions: List of item collections, or a callable returning a new
+                      iterator over them (two passes are made)
+        min_support: Minimum fraction of transactions containing an itemset
+        max_len: Largest itemset size to mine (default: no limit)
+        chunk_size: Transactions read and inserted per chunk
+
+    Returns:
+        Tuple of (dictionary frozenset of items -> transaction count, number of transactions)
+    """
+    # Pass 1: item frequencies
+    item_counts = Counter()
+    n_transactions = 0
+    for chunk in _chunks(_passes(transactions), chunk_size):
+        n_transactions += len(chunk)
+        for transaction in chunk:
+            item_counts.update(set(transaction))
+
+    min_count = min_count_for(min_support, n_transactions)
+    frequent_items = sorted((item for item, count in item_counts.items() if count >= min_count),
+                            key=lambda item: (-item_counts[item], item))
+    ranks = {item: rank for rank, item in enumerate(frequent_items)}
+
+    # Pass 2: insert each chunk's distinct frequent-item paths once, with their multiplicity
+    tree = FPTree()
+    for chunk in _chunks(_passes(transactions), chunk_size):
+        paths = Counter(tuple(sorted(ranks[item] for item in set(transaction) if item in ranks))
+                        for transaction in chunk)
+        for path, count in paths.items():
+            if path:
+                tree.insert(path, count)
+
+    itemsets = {}
+    _mine(tree, (), min_count, max_len, itemsets)
+    return {frozenset(frequent_items[rank] for rank in ranked): count
+            for ranked, count in itemsets.items()}, n_transactions
+
+
+def _mine(tree, suffix, min_count, max_len, itemsets):
+    # Least frequent items first: each one's conditional tree only holds more frequent items
+    for item in sorted(tree.item_counts, reverse=True):
+        count = tree.item_counts[item]
+        if count < min_count:
+            continue
+        itemset = suffix + (item,)
+        itemsets[itemset] = count
+
+        if max_len is not None and len(itemset) >= max_len:
+            continue
+        conditional = FPTree.conditional(list(tree.prefix_paths(item)), min_count)
+        if conditional.header:
+            _mine(conditional, itemset, min_count, max_len, itemsets)
+
+
+def apriori(transactions, min_support, max_len=None):
+    """
+    Mine frequent itemsets level by level (Apriori baseline for benchmarks)
+
+    Every level generates all candidate (k+1)-itemsets whose k-subsets are
+    frequent and counts them in one pass over the transactions.
+
+    Returns:
+        Same as fp_growth
+    """
+    transactions = [frozenset(transaction) for transaction in _passes(transactions)]
+    min_count = min_count_for(min_support, len(transactions))
+
+    item_counts = Counter(item for transaction in transactions for item in transaction)
+    level = {frozenset([item]): count for item, count in item_counts.items() if count >= min_count}
+    itemsets = dict(level)
+
+    size = 1
+    while level and (max_len is None or size < max_len):
+        previous = list(level)
+        candidates = set()
+        for first, second in combinations(previous, 2):
+            union = first | second
+            if len(union) == size + 1 and all(union - {item} in level for item in union):
+                candidates.add(union)
+
+        counts = Counter()
+        for transaction in transactions:
+            for candidate in candidates:
+                if candidate <= transaction:
+                    counts[candidate] += 1
+
+        level = {itemset: count for itemset, count in counts.items() if count >= min_count}
+        itemsets.update(level)
+        size += 1
+
+    return itemsets, len(transactions)
+
+
+def association_rules(itemsets, n_transactions, min_confidence):
+    """
+    Single-consequent rules antecedent -> consequent from frequent itemsets
+
+    Returns:
+        List of rule dictionaries with 'antecedent' (sorted tuple), 'consequent',
+        'support', 'confidence' and 'lift', by descending confidence
+    """
+    rules = []
+    for itemset, count in itemsets.items():
+        if len(itemset) < 2:
+            continue
+        for consequent in itemset:
+            antecedent = itemset - {consequent}
+            confidence = count / itemsets[antecedent]
+            if confidence < min_confidence:
+                continue
+            rules.append({
+                'antecedent': tuple(sorted(antecedent)),
+                'consequent': consequent,
+                'support': count / n_transactions,
+                'confidence': confidence,
+                'lift': confidence / (itemsets[frozenset([consequent])] / n_transactions)
+            })
+
+    rules.sort(key=lambda rule: (-rule['confidence'], -rule['support'], rule['antecedent'], rule['consequent']))
+    return rules
+
+
+class ItemsetMiner:
+    """
+    Frequent itemsets and association rules of a set of transactions
+    """
+
+    def __init__(self, min_support=0.02, min_confidence=0.15, max_len=3, chunk_size=10000):
+        """
+        Initialize the miner
+
+        Args:
+            min_support: Minimum fraction of transactions containing an itemset
+            min_confidence: Minimum confidence of an association rule
+            max_len: Largest itemset size (antecedents have up to max_len - 1 items)
+            chunk_size: Transactions read per chunk
+        """
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+        self.max_len = max_len
+        self.chunk_size = chunk_size
+        self.itemsets = {}  # frozenset -> transaction count
+        self.n_transactions = 0
+        self.rules = []
+        self.rules_by_consequent = {}  # item -> its rules, by descending confidence
+
+    def fit(self, transactions):
+        """
+        Mine itemsets and rules
+
+        Args:
+            transactions: List of item collections, or a callable returning a new iterator over them
+        """
+        self.itemsets, self.n_transactions = fp_growth(
+            transactions, self.min_support, self.max_len, self.chunk_size
+        )
+        self.rules = association_rules(self.itemsets, self.n_transactions, self.min_confidence)
+        self._index_rules()
+        return self
+
+    def _index_rules(self):
+        by_consequent = defaultdict(list)
+        for rule in self.rules:
+            by_consequent[rule['consequent']].append(rule)
+        self.rules_by_consequent = dict(by_consequent)
+
+    def best_rule(self, consequent, context):
+        """
+        Most confident rule predicting consequent from items all present in context
+
+        Returns:
+            Rule dictionary, or None when no rule applies
+        """
+        context = set(context)
+        for rule in self.rules_by_consequent.get(consequent, []):
+            if context.issuperset(rule['antecedent']):
+                return rule
+        return None
+
+    def save(self, filepath):
+        """Save the mined itemsets and rules"""
+        model_data = {
+            'min_support': self.min_support,
+            'min_confidence': self.min_confidence,
+            'max_len': self.max_len,
+            'itemsets': self.itemsets,
+            'n_transactions': self.n_transactions,
+            'rules': self.rules
+        }
+        joblib.dump(model_data, filepath)
+
+    def load(self, filepath):
+        """Load mined itemsets and rules"""
+        model_data = joblib.load(filepath)
+        self.min_support = model_data['min_support']
+        self.min_confidence = model_data['min_confidence']
+        self.max_len = model_data['max_len']
+        self.itemsets = model_data['itemsets']
+        self.n_transactions = model_data['n_transactions']
+        self.rules = model_data['rules']
+        self._index_rules()
+        return self
+
+
+# FP-Growth vs Apriori: time and peak memory as min_support goes down
+if __name__ == '__main__':
+    import time
+    import tracemalloc
+
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    n_transactions, n_items = 5000, 300
+    popularity = 1.0 / np.arange(1, n_items + 1)
+    popularity /= popularity.sum()
+    transactions = [[f"item{item}" for item in rng.choice(n_items, rng.integers(5, 15), replace=False, p=popularity)]
+                    for _ in range(n_transactions)]
+
+    def measure(miner, min_support):
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        itemsets, _ = miner(transactions, min_support, max_len=4)
+        elapsed = time.perf_counter() - start_time
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return itemsets, elapsed, peak
+
+    print(f"{n_transactions} transactions over {n_items} items (max itemset size 4)")
+    print(f"{'min_support':>11} {'itemsets':>9} {'fp-growth':>16} {'apriori':>16}")
+    for min_support in (0.1, 0.05, 0.03, 0.02):
+        fp_itemsets, fp_time, fp_peak = measure(fp_growth, min_support)
+        ap_itemsets, ap_time, ap_peak = measure(apriori, min_support)
+        assert fp_itemsets == ap_itemsets
+        print(f"{min_support:>11} {len(fp_itemsets):>9} "
+              f"{fp_time:>7.2f}s {fp_peak / 1e6:>6.1f}MB {ap_time:>7.2f}s {ap_peak / 1e6:>6.1f}MB")
@@ -0,0 +1,392 @@
+"""
+Top-K Neighbor Lists
+Stores the K most similar rows for every row as fixed-size index/score arrays
+so serving reads K neighbors instead of scanning a full similarity row
+"""
+
+import copy
+import time
+import numpy as np
+from scipy import sparse
+
+try:
+    from .row_blocks import RowBlocks
+except ImportError:
+    from row_blocks import RowBlocks
+
+
+def top_k_from_block(similarity, row_ids, k):
+    """
+    Select the top-K entries of each row of a similarity block
+
+    Args:
+        similarity: Dense array of shape (len(row_ids), n_columns)
+        row_ids: Global index of each row, excluded from its own neighbors
+        k: Number of neighbors to keep
+
+    Returns:
+        Tuple of (indices, scores), both of shape (len(row_ids), k), sorted by
+        descending score. Missing neighbors (score <= 0) are padded with -1 / 0.
+    """
+    similarity = np.array(similarity, dtype=np.float32)
+    n_rows, n_columns = similarity.shape
+    k_eff = min(k, n_columns)
+
+    # A row is never its own neighbor
+    own = np.asarray(row_ids) < n_columns
+    similarity[np.flatnonzero(own), np.asarray(row_ids)[own]] = -np.inf
+
+    indices = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+    if k_eff == 0:
+        return indices, scores
+
+    candidates = np.argpartition(-similarity, k_eff - 1, axis=1)[:, :k_eff]
+    candidate_scores = np.take_along_axis(similarity, candidates, axis=1)
+
+    # Sort the K candidates by score, breaking ties by column index
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+    keep = candidate_scores > 0
+    indices[:, :k_eff] = np.where(keep, candidates, -1)
+    scores[:, :k_eff] = np.where(keep, candidate_scores, 0)
+    return indices, scores
+
+
+class TopKNeighbors:
+    """
+    Fixed-size neighbor lists: (n x K) int32 indices and float32 scores,
+    padded with -1 / 0, stored as copy-on-write row blocks so a copy shares
+    every list until it is refreshed
+    """
+
+    def __init__(self, indices, scores):
+        self.indices = indices if isinstance(indices, RowBlocks) else RowBlocks(indices)
+        self.scores = scores if isinstance(scores, RowBlocks) else RowBlocks(scores)
+
+    def __getstate__(self):
+        # Same on-disk layout as plain (n x K) arrays
+        return {'indices': self.indices.to_array(), 'scores': self.scores.to_array()}
+
+    def __setstate__(self, state):
+        self.__init__(state['indices'], state['scores'])
+
+    @property
+    def k(self):
+        return self.indices.width
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.scores.nbytes
+
+    def __len__(self):
+        return len(self.indices)
+
+    def neighbors(self, row):
+        """Get (indices, scores) of one row's neighbors, without padding"""
+        indices, scores = self.indices[row], self.scores[row]
+        valid = indices >= 0
+        return indices[valid], scores[valid]
+
+    def to_sparse(self, rows=None, n_columns=None):
+        """
+        Neighbor weights as a sparse (len(rows) x n_columns) matrix
+
+        Multiplying it with a rating matrix aggregates over neighbors only.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=int)
+        n_columns = len(self) if n_columns is None else n_columns
+
+        indices = self.indices[rows]
+        valid = indices >= 0
+        row_positions = np.repeat(np.arange(len(rows)), valid.sum(axis=1))
+        return sparse.csr_matrix(
+            (self.scores[rows][valid], (row_positions, indices[valid])),
+            shape=(len(rows), n_columns)
+        )
+
+    def copy(self):
+        """Copy sharing the lists; only the row blocks it later rewrites are duplicated"""
+        return TopKNeighbors(self.indices.copy(), self.scores.copy())
+
+    def grow(self, n_rows):
+        """Extend the lists with empty rows, e.g. for newly added users"""
+        self.indices.grow(n_rows, -1)
+        self.scores.grow(n_rows, 0)
+
+
+class ReverseNeighbors:
+    """
+    For every row, the rows whose neighbor lists contain it
+
+    Stored as sorted (neighbor << 32 | row) keys bucketed by neighbor block.
+    Buckets are replaced, never modified in place, so copy() shares all of
+    them and an update rebuilds only the buckets of the changed pairs.
+    """
+
+    def __init__(self, keys=None, bucket_rows=64):
+        self.bucket_rows = bucket_rows
+        self._buckets = []
+        if keys is not None and len(keys):
+            keys = np.sort(keys)
+            buckets = (keys >> 32) // bucket_rows
+            boundaries = np.searchsorted(buckets, np.arange(int(buckets[-1]) + 2))
+            self._buckets = [keys[boundaries[i]:boundaries[i + 1]] for i in range(len(boundaries) - 1)]
+
+    @staticmethod
+    def keys(rows, indices):
+        """Keys of the (neighbor, row) pairs in the given rows' lists, padding skipped"""
+        valid = indices >= 0
+        rows = np.broadcast_to(np.asarray(rows, dtype=np.int64)[:, None], indices.shape)[valid]
+        return (indices[valid].astype(np.int64) << 32) | rows
+
+    @classmethod
+    def from_neighbors(cls, neighbors):
+        """Index every list of a TopKNeighbors (O(n x K), done once per build or load)"""
+        keys = [np.zeros(0, dtype=np.int64)]
+        for start in range(0, len(neighbors), neighbors.indices.block_rows):
+            rows = np.arange(start, min(start + neighbors.indices.block_rows, len(neighbors)))
+            keys.append(cls.keys(rows, neighbors.indices[rows]))
+        return cls(np.concatenate(keys))
+
+    def copy(self):
+        other = ReverseNeighbors.__new__(ReverseNeighbors)
+        other.bucket_rows = self.bucket_rows
+        other._buckets = list(self._buckets)
+        return other
+
+    def rows_listing(self, neighbor_ids):
+        """Unique rows whose lists contain any of neighbor_ids"""
+        found = [np.zeros(0, dtype=np.int64)]
+        for neighbor in np.asarray(neighbor_ids, dtype=np.int64):
+            bucket = neighbor // self.bucket_rows
+            if bucket >= len(self._buckets):
+                continue
+            keys = self._buckets[bucket]
+            start, end = np.searchsorted(keys, [neighbor << 32, (neighbor + 1) << 32])
+            found.append(keys[start:end] & 0xFFFFFFFF)
+        return np.unique(np.concatenate(found))
+
+    def update(self, removed, added):
+        """Drop the removed keys and insert the added ones"""
+        changed = np.concatenate([removed, added])
+        if len(changed) == 0:
+            return
+        buckets = (changed >> 32) // self.bucket_rows
+        n_buckets = int(buckets.max()) + 1
+        if n_buckets > len(self._buckets):
+            self._buckets.extend(np.zeros(0, dtype=np.int64) for _ in range(n_buckets - len(self._buckets)))
+
+        removed_buckets = (removed >> 32) // self.bucket_rows
+        added_buckets = (added >> 32) // self.bucket_rows
+        for bucket in np.unique(buckets):
+            keys = self._buckets[bucket]
+            keys = keys[~np.isin(keys, removed[removed_buckets == bucket])]
+            self._buckets[bucket] = np.union1d(keys, added[added_buckets == bucket])
+
+
+def _blocked_similarity():
+    # Imported on first use: the blocked similarity module builds on TopKNeighbors
+    try:
+        from . import blocked_similarity
+    except ImportError:
+        import blocked_similarity
+    return blocked_similarity
+
+
+class NeighborhoodIndex:
+    """
+    Top-K most similar rows for every row of a RatingStore
+    Refreshed incrementally when some rows' ratings change
+    """
+
+    def __init__(self, k=50, block_rows=None, max_block_bytes=None, n_jobs=1):
+        """
+        Initialize the neighborhood index
+
+        Args:
+            k: Number of neighbors kept per row
+            block_rows: Rows per dense similarity tile (default: derived from max_block_bytes)
+            max_block_bytes: Memory ceiling for one tile (default: the blocked
+                             similarity module's DEFAULT_MAX_BLOCK_BYTES)
+            n_jobs: Worker processes for the initial build
+        """
+        self.k = k
+        self.block_rows = block_rows
+        self.max_block_bytes = max_block_bytes
+        self.n_jobs = n_jobs
+        self.neighbors = None
+        self.listed_by = None  # ReverseNeighbors of self.neighbors, rebuilt when missing
+        self.stats = {}
+
+    def __getstate__(self):
+        # The reverse index is derived from the lists, so it is not saved
+        state = dict(self.__dict__)
+        state['listed_by'] = None
+        return state
+
+    def __setstate__(self, state):
+        # Indexes saved before the memory ceiling existed only had block_size
+        state.setdefault('block_rows', state.pop('block_size', None))
+        state.setdefault('max_block_bytes', None)
+        state.setdefault('n_jobs', 1)
+        state.setdefault('listed_by', None)
+        self.__dict__.update(state)
+
+    def _n_rows(self, ratings):
+        raise NotImplementedError
+
+    def _features(self, ratings):
+        """Sparse matrix with one row per indexed item"""
+        raise NotImplementedError
+
+    def _similarity(self, ratings, row_ids):
+        raise NotImplementedError
+
+    def _tile_rows(self, n_columns):
+        """Rows per dense similarity tile of width n_columns"""
+        if self.block_rows is not None:
+            return self.block_rows
+        blocked = _blocked_similarity()
+        return blocked.block_rows_for(n_columns, self.max_block_bytes or blocked.DEFAULT_MAX_BLOCK_BYTES)
+
+    def _similarity_tiles(self, ratings, row_ids):
+        """(row ids, similarity tile) pairs covering row_ids, each tile under the memory ceiling"""
+        n_rows = self._n_rows(ratings)
+        tile_rows = self._tile_rows(n_rows)
+        for start in range(0, len(row_ids), tile_rows):
+            rows = row_ids[start:start + tile_rows]
+            yield rows, self._similarity(ratings, rows)
+
+    def build(self, ratings):
+        """
+        Build neighbor lists for every row of the rating store with the
+        shared blocked top-K utility (tiles sized by the memory ceiling)
+        """
+        start_time = time.perf_counter()
+
+        blocked = _blocked_similarity()
+        self.neighbors = blocked.blocked_top_k(
+            self._features(ratings), self.k, metric='cosine', n_jobs=self.n_jobs,
+            block_rows=self.block_rows,
+            max_block_bytes=self.max_block_bytes or blocked.DEFAULT_MAX_BLOCK_BYTES
+        )
+        self.listed_by = ReverseNeighbors.from_neighbors(self.neighbors)
+
+        self.stats = {
+            'k': self.k,
+            'n_rows': len(self.neighbors),
+            'build_seconds': time.perf_counter() - start_time,
+            'index_bytes': self.neighbors.nbytes,
+            'last_refresh_seconds': None,
+            'last_refresh_rows': 0
+        }
+        return self
+
+    def copy(self):
+        """Independent copy: refreshing it leaves this index (and its readers) untouched"""
+        index = copy.copy(self)
+        index.neighbors = self.neighbors.copy()
+        if self.listed_by is not None:
+            index.listed_by = self.listed_by.copy()
+        index.stats = dict(self.stats)
+        return index
+
+    def refresh(self, ratings, row_ids):
+        """
+        Update neighbor lists after the given rows' ratings changed
+
+        Recomputes the changed rows' lists and the lists that contained them,
+        found through the reverse-neighbor index. Every other list only gains
+        a changed row if it now beats that list's weakest neighbor, so the
+        rest of the population is never rescanned. The lists are updated in
+        place; refresh a copy() of an index that readers may be using, which
+        only duplicates the row blocks this refresh writes.
+
+        Args:
+            ratings: RatingStore with the updated ratings
+            row_ids: Rows whose ratings changed (may include new rows)
+        """
+        start_time = time.perf_counter()
+        row_ids = np.unique(np.asarray(row_ids, dtype=int))
+        self.neighbors.grow(self._n_rows(ratings))
+        if self.listed_by is None:
+            self.listed_by = ReverseNeighbors.from_neighbors(self.neighbors)
+
+        # Lists that referenced a changed row may have lost it: recompute fully
+        stale_rows = np.union1d(self.listed_by.rows_listing(row_ids), row_ids)
+        stale_before = self.neighbors.indices[stale_rows]
+        for rows, similarity in self._similarity_tiles(ratings, stale_rows):
+            indices, scores = top_k_from_block(similarity, rows, self.k)
+            self.neighbors.indices.assign(rows, indices)
+            self.neighbors.scores.assign(rows, scores)
+
+        # Other lists: insert a changed row where it beats the weakest neighbor
+        weakest = self.neighbors.scores.column(-1)
+        inserted_before = {}  # row -> its list before the first insertion
+        for changed_rows, similarity in self._similarity_tiles(ratings, row_ids):
+            for column, changed_row in zip(similarity, changed_rows):
+                column[changed_row] = 0
+                column[stale_rows] = 0
+                candidates = np.flatnonzero(column > weakest)
+                for row in candidates:
+                    if row not in inserted_before:
+                        inserted_before[row] = self.neighbors.indices[row].copy()
+                    self._insert(row, changed_row, column[row])
+                    weakest[row] = self.neighbors.scores[row][-1]
+
+        # Keep the reverse index in step with the rewritten lists
+        inserted_rows = np.fromiter(inserted_before, dtype=np.int64, count=len(inserted_before))
+        rows = np.concatenate([stale_rows, inserted_rows])
+        before = np.vstack([stale_before] + [inserted_before[row][None] for row in inserted_rows])
+        old_keys = ReverseNeighbors.keys(rows, before)
+        new_keys = ReverseNeighbors.keys(rows, self.neighbors.indices[rows])
+        self.listed_by.update(np.setdiff1d(old_keys, new_keys), np.setdiff1d(new_keys, old_keys))
+
+        self.stats['n_rows'] = len(self.neighbors)
+        self.stats['index_bytes'] = self.neighbors.nbytes
+        self.stats['last_refresh_seconds'] = time.perf_counter() - start_time
+        self.stats['last_refresh_rows'] = len(stale_rows)
+        return self
+
+    def _insert(self, row, neighbor, score):
+        """Insert one neighbor into a row's sorted list, dropping the weakest"""
+        indices, scores = self.neighbors.indices.writable_row(row), self.neighbors.scores.writable_row(row)
+        position = int(np.searchsorted(-scores, -score, side='right'))
+        indices[position + 1:] = indices[position:-1].copy()
+        scores[position + 1:] = scores[position:-1].copy()
+        indices[position] = neighbor
+        scores[position] = score
+
+    def weights(self, row_ids, n_rows):
+        """Sparse (len(row_ids) x n_rows) matrix of neighbor similarities"""
+        return self.neighbors.to_sparse(row_ids, n_rows)
+
+
+class UserNeighborhoodIndex(NeighborhoodIndex):
+    """Top-K most similar users for every user (user-user collaborative filtering)"""
+
+    def _n_rows(self, ratings):
+        return ratings.n_users
+
+    def _features(self, ratings):
+        return ratings.csr
+
+    def _similarity(self, ratings, row_ids):
+        return ratings.user_similarity(row_ids)
+
+
+class ItemNeighborhoodIndex(NeighborhoodIndex):
+    """Top-K most similar recipes for every recipe, from co-rating patterns (item-item)"""
+
+    def _n_rows(self, ratings):
+        return ratings.n_recipes
+
+    def _features(self, ratings):
+        # Each recipe's ratings as a row (CSR view of the CSC arrays, no copy)
+        return ratings.csc.T
+
+    def _similarity(self, ratings, row_ids):
+        return ratings.recipe_similarity(row_ids)
@@ -8,7 +8,8 @@ from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
-from .world_recipes_data import get_world_recipes
+from .recipe_catalog import get_world_catalog
+from .ingredient_resolver import IngredientResolver
 
 class NutritionPredictor:
     """
@@ -20,16 +21,33 @@ class NutritionPredictor:
     - Trained on world recipes with nutritional data
     """
     
-    def __init__(self, use_ridge=True, alpha=1.0):
+    # Columns of the ingredient x nutrient table
+    NUTRIENTS = ('calories', 'protein', 'fat', 'carbs', 'fiber')
+    
+    # Portion sizes (grams) used for direct ingredient lookup
+    PORTION_SIZES = {
+        'chicken': 150, 'beef': 150, 'pork': 150, 'lamb': 150, 'turkey': 150,
+        'shrimp': 100, 'salmon': 120, 'cod': 120, 'tuna': 100, 'tofu': 100,
+        'rice': 75, 'pasta': 75, 'noodles': 75, 'bread': 50, 'quinoa': 75,
+        'tomato': 100, 'onion': 50, 'garlic': 5, 'ginger': 5,
+        'lettuce': 50, 'cucumber': 80, 'carrot': 50, 'broccoli': 85,
+        'cheese': 30, 'milk': 200, 'yogurt': 150, 'butter': 10, 'cream': 30,
+        'egg': 50, 'olive oil': 10, 'oil': 10, 'soy sauce': 15,
+        'default': 50
+    }
+    
+    def __init__(self, use_ridge=True, alpha=1.0, catalog=None):
         """
         Initialize the nutrition predictor
         
         Args:
             use_ridge: Use Ridge regression for regularization (default: True)
             alpha: Regularization strength for Ridge regression
+            catalog: RecipeCatalog with the recipes (default: the shared world catalog)
         """
         self.use_ridge = use_ridge
         self.alpha = alpha
+        self.catalog = catalog
         
         # Models for each nutritional component
         self.models = {
@@ -50,8 +68,37 @@ class NutritionPredictor:
         # Training metrics
         self.metrics = {}
         
+        # Nutrition of every catalog recipe, by catalog position
+        self.recipe_totals = None
+        self.recipe_nutrition = None
+        self.catalog_version = None
+        
         # Initialize ingredient nutritional data
         self._init_ingredient_nutrition()
+        
+        # Maps free-text ingredient names to keys of the nutrition table
+        self.resolver = IngredientResolver(list(self.ingredient_nutrition))
+        self._compile_nutrition_table()
+    
+    def _compile_nutrition_table(self):
+        """
+        Compile the nutrition data into arrays indexed by resolver id:
+        nutrient_table (per 100g) and portion_sizes (grams)
+        
+        Kept in float64: the served values are rounded to 0.1 and many totals
+        land on x.x5, so float32 inputs would change the rounded results.
+        """
+        keys = self.resolver.terms
+        self.nutrient_table = np.array(
+            [[self.ingredient_nutrition[key][nutrient] for nutrient in self.NUTRIENTS] for key in keys],
+            dtype=np.float64
+        )
+        self.portion_sizes = np.array(
+            [self.PORTION_SIZES.get(key, self.PORTION_SIZES['default']) for key in keys],
+            dtype=np.float64
+        )
+        # Nutrients of one assumed portion of each ingredient
+        self.portion_table = self.nutrient_table * (self.portion_sizes / 100.0)[:, None]
     
     def _init_ingredient_nutrition(self):
         """Initialize nutritional values for common ingredients (per 100g)"""
@@ -305,8 +352,10 @@ class NutritionPredictor:
         """Train the regression models on recipe data"""
         print("\n🍽️  Training Nutrition Predictor...")
         
-        # Get recipes
-        recipes = get_world_recipes()
+        # Get recipes from the shared catalog
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
+        recipes = self.catalog.recipes
         
         # Generate synthetic nutrition data for recipes
         X = []
@@ -372,6 +421,9 @@ class NutritionPredictor:
         for nutrient, metrics in self.metrics.items():
             print(f"  {nutrient.capitalize():10s} - MAE: {metrics['mae']:.2f}, R²: {metrics['r2']:.3f}")
         
+        self.precompute_recipe_nutrition()
+        print(f"✅ Nutrition precomputed for {len(self.recipe_nutrition)} catalog recipes")
+        
         return self.metrics
     
     def predict(self, ingredients):
@@ -384,51 +436,89 @@ class NutritionPredictor:
         Returns:
             Dictionary with predicted nutritional values
         """
-        # Use direct calculation from ingredient database for more accurate results
-        total_calories = 0
-        total_protein = 0
-        total_fat = 0
-        total_carbs = 0
-        total_fiber = 0
-        
-        # Portion sizes (grams)
-        portion_sizes = {
-            'chicken': 150, 'beef': 150, 'pork': 150, 'lamb': 150, 'turkey': 150,
-            'shrimp': 100, 'salmon': 120, 'cod': 120, 'tuna': 100, 'tofu': 100,
-            'rice': 75, 'pasta': 75, 'noodles': 75, 'bread': 50, 'quinoa': 75,
-            'tomato': 100, 'onion': 50, 'garlic': 5, 'ginger': 5,
-            'lettuce': 50, 'cucumber': 80, 'carrot': 50, 'broccoli': 85,
-            'cheese': 30, 'milk': 200, 'yogurt': 150, 'butter': 10, 'cream': 30,
-            'egg': 50, 'olive oil': 10, 'oil': 10, 'soy sauce': 15,
-            'default': 50
-        }
+        totals, matched_counts = self._nutrition_totals([ingredients])
+        return self._format_nutrition(totals[0], matched_counts[0])
+    
+    def predict_many(self, recipes):
+        """
+        Predict nutrition for many recipes at once
         
-        matched_count = 0
+        All ingredient lists are resolved in one pass and their totals are
+        computed together; recipe ids read the precomputed catalog table.
         
-        for ingredient in ingredients:
-            ingredient_lower = ingredient.lower().strip()
-            
-            # Try to find nutrition data
-            nutrition = None
-            portion = portion_sizes.get('default')
-            
-            # Match ingredient
-            for key in self.ingredient_nutrition:
-                if key in ingredient_lower or ingredient_lower in key:
-                    nutrition = self.ingredient_nutrition[key]
-                    portion = portion_sizes.get(key, portion_sizes.get('default'))
-                    matched_count += 1
-                    break
-            
-            if nutrition:
-                # Calculate based on portion (nutrition data is per 100g)
-                factor = portion / 100.0
-                total_calories += nutrition['calories'] * factor
-                total_protein += nutrition['protein'] * factor
-                total_fat += nutrition['fat'] * factor
-                total_carbs += nutrition['carbs'] * factor
-                total_fiber += nutrition['fiber'] * factor
+        Args:
+            recipes: List whose items are either a list of ingredient names
+                     or a catalog recipe id
+        
+        Returns:
+            List in input order: a nutrition dictionary (as predict) for each
+            ingredient list, a dictionary as predict_recipe for each known
+            recipe id and None for unknown ids
+        """
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
+        
+        results = [None] * len(recipes)
+        
+        list_positions = [i for i, item in enumerate(recipes) if isinstance(item, (list, tuple))]
+        totals, matched_counts = self._nutrition_totals([recipes[i] for i in list_positions])
+        for i, recipe_totals, matched_count in zip(list_positions, totals, matched_counts):
+            results[i] = self._format_nutrition(recipe_totals, matched_count)
         
+        for i, item in enumerate(recipes):
+            if not isinstance(item, (list, tuple)):
+                recipe = self.catalog.get(item)
+                if recipe is not None:
+                    results[i] = self._recipe_result(recipe)
+        
+        return results
+    
+    def _ingredient_ids(self, ingredient_lists):
+        """
+        Resolve every ingredient of every recipe in one pass
+        
+        Returns:
+            Tuple of (int array of shape (n_recipes, longest list) holding the
+            nutrition table row of each ingredient, len(resolver.terms) = no
+            match; number of matched ingredients per recipe)
+        """
+        no_match = len(self.resolver.terms)
+        width = max((len(ingredients) for ingredients in ingredient_lists), default=0)
+        key_ids = np.full((len(ingredient_lists), width), no_match, dtype=np.int64)
+        
+        for row, ingredients in enumerate(ingredient_lists):
+            for position, ingredient in enumerate(ingredients):
+                key_id = self.resolver.resolve(ingredient)
+                if key_id is not None:
+                    key_ids[row, position] = key_id
+        
+        return key_ids, (key_ids != no_match).sum(axis=1)
+    
+    def _nutrition_totals(self, ingredient_lists):
+        """
+        Nutrient totals of many recipes at once
+        
+        Each recipe's per-portion rows are gathered from the table and added
+        column by column, vectorized over recipes. Keeping the ingredients'
+        order keeps the floating-point sums (and so the rounded values)
+        identical to adding them up one at a time.
+        
+        Returns:
+            Tuple of (totals array of shape (n_recipes, len(NUTRIENTS)),
+            number of matched ingredients per recipe)
+        """
+        key_ids, matched_counts = self._ingredient_ids(ingredient_lists)
+        
+        # Extra all-zero row for unmatched ingredients and padding
+        table = np.vstack([self.portion_table, np.zeros((1, len(self.NUTRIENTS)))])
+        totals = np.zeros((len(ingredient_lists), len(self.NUTRIENTS)))
+        for position in range(key_ids.shape[1]):
+            totals += table[key_ids[:, position]]
+        
+        return totals, matched_counts
+    
+    def _format_nutrition(self, totals, matched_count):
+        """Rounded nutrition dictionary of one recipe's totals"""
         # If no ingredients matched, provide reasonable defaults
         if matched_count == 0:
             return {
@@ -439,7 +529,7 @@ class NutritionPredictor:
                 'fiber': 3.0
             }
         
-        # Return predictions
+        total_calories, total_protein, total_fat, total_carbs, total_fiber = totals.tolist()
         return {
             'calories': max(0, round(total_calories)),
             'protein': max(0, round(total_protein, 1)),
@@ -459,25 +549,54 @@ class NutritionPredictor:
         Returns:
             Dictionary with recipe info and nutritional predictions
         """
-        recipes = get_world_recipes()
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
         
         recipe = None
         if recipe_id:
-            recipe = next((r for r in recipes if r['id'] == recipe_id), None)
+            recipe = self.catalog.get(recipe_id)
         elif recipe_name:
-            recipe = next((r for r in recipes if r['name'].lower() == recipe_name.lower()), None)
+            recipe = self.catalog.get_by_name(recipe_name)
         
         if not recipe:
             raise ValueError(f"Recipe not found")
         
-        predictions = self.predict(recipe['ingredients'])
+        return self._recipe_result(recipe)
+    
+    def precompute_recipe_nutrition(self):
+        """
+        Compute the nutrition of every catalog recipe in one batch
+        
+        Serving reads these by catalog position; they are recomputed
+        automatically when the catalog version changes.
+        """
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
+        
+        version = self.catalog.version
+        totals, matched_counts = self._nutrition_totals(
+            [recipe['ingredients'] for recipe in self.catalog.recipes]
+        )
+        self.recipe_totals = totals
+        self.recipe_nutrition = [
+            self._format_nutrition(recipe_totals, matched_count)
+            for recipe_totals, matched_count in zip(totals, matched_counts)
+        ]
+        self.catalog_version = version
+        return self.recipe_nutrition
+    
+    def _recipe_result(self, recipe):
+        """Recipe info with its precomputed nutrition"""
+        recipe_nutrition = self.recipe_nutrition
+        if self.catalog_version != self.catalog.version or recipe_nutrition is None:
+            recipe_nutrition = self.precompute_recipe_nutrition()
         
         return {
             'recipe_id': recipe['id'],
             'recipe_name': recipe['name'],
             'cuisine': recipe['cuisine'],
             'ingredients': recipe['ingredients'],
-            'nutrition': predictions,
+            'nutrition': dict(recipe_nutrition[self.catalog.position(recipe['id'])]),
             'per_serving': True
         }
     
@@ -495,12 +614,14 @@ class NutritionPredictor:
         Returns:
             List of recipe nutritional information
         """
+        if self.catalog is None:
+            self.catalog = get_world_catalog()
+        
+        # Unknown ids are skipped
         results = []
         for recipe_id in recipe_ids:
-            try:
-                result = self.predict_recipe(recipe_id=recipe_id)
-                results.append(result)
-            except ValueError:
-                pass
+            recipe = self.catalog.get(recipe_id) if recipe_id else None
+            if recipe is not None:
+                results.append(self._recipe_result(recipe))
         
         return results
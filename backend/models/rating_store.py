@@ -0,0 +1,269 @@
+"""
+Sparse User-Item Rating Store
+Keeps ratings in CSR form (fast per-user rows) and CSC form (fast per-recipe columns)
+so memory scales with the number of ratings instead of users x recipes
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+def _inverse(norms):
+    return np.divide(1.0, norms, out=np.zeros(len(norms)), where=norms > 0)
+
+
+def _scale_to_cosine(dot_products, row_norms, column_norms):
+    """
+    Turn a dense block of dot products into cosine similarities in place
+    (0 where either side has no ratings), so the block is the only dense tile
+    """
+    dot_products *= _inverse(row_norms)[:, None]
+    dot_products *= _inverse(column_norms)[None, :]
+    return dot_products
+
+
+class RatingStore:
+    """
+    Sparse user-item rating matrix
+    Ratings: missing = not rated, 1-5 = user rating
+    """
+
+    def __init__(self, matrix=None, shape=(0, 0), user_norms=None, recipe_norms=None):
+        """
+        Initialize the rating store
+
+        Args:
+            matrix: Any scipy sparse matrix or dense array of ratings (optional)
+            shape: (n_users, n_recipes) of an empty store when no matrix is given
+            user_norms: Precomputed L2 norm of each user's ratings (optional)
+            recipe_norms: Precomputed L2 norm of each recipe's ratings (optional)
+        """
+        if matrix is None:
+            matrix = sparse.csr_matrix(shape, dtype=np.float32)
+
+        self.csr = sparse.csr_matrix(matrix, dtype=np.float32)
+        self.csr.eliminate_zeros()
+        self.csr.sort_indices()
+        self.csc = self.csr.tocsc()
+
+        # Same sparsity pattern with all ones (sharing the CSR index arrays):
+        # marks which users rated which recipes
+        self.rated = sparse.csr_matrix(
+            (np.ones(self.csr.nnz, dtype=np.float32), self.csr.indices, self.csr.indptr),
+            shape=self.csr.shape
+        )
+
+        if user_norms is None:
+            user_norms = np.sqrt(np.asarray(self.csr.multiply(self.csr).sum(axis=1)).ravel())
+        if recipe_norms is None:
+            recipe_norms = np.sqrt(np.asarray(self.csc.multiply(self.csc).sum(axis=0)).ravel())
+        self.user_norms = user_norms
+        self.recipe_norms = recipe_norms
+
+    @classmethod
+    def from_dense(cls, ratings):
+        """Build a store from a dense users x recipes array (0 = not rated)"""
+        return cls(sparse.csr_matrix(np.asarray(ratings, dtype=np.float32)))
+
+    @classmethod
+    def from_triplets(cls, user_indices, recipe_indices, ratings, shape=None):
+        """
+        Build a store from parallel (user, recipe, rating) arrays
+
+        Args:
+            user_indices: Row index of each rating
+            recipe_indices: Column index of each rating
+            ratings: Rating values
+            shape: (n_users, n_recipes), inferred from the indices if omitted
+        """
+        matrix = sparse.coo_matrix(
+            (np.asarray(ratings, dtype=np.float32), (user_indices, recipe_indices)),
+            shape=shape
+        )
+        # Duplicate (user, recipe) pairs are summed
+        matrix.sum_duplicates()
+        return cls(matrix)
+
+    @property
+    def shape(self):
+        return self.csr.shape
+
+    @property
+    def n_users(self):
+        return self.csr.shape[0]
+
+    @property
+    def n_recipes(self):
+        return self.csr.shape[1]
+
+    @property
+    def nnz(self):
+        return self.csr.nnz
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the store's arrays"""
+        total = self.user_norms.nbytes + self.recipe_norms.nbytes
+        for matrix in (self.csr, self.csc, self.rated):
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        return total
+
+    def user_ratings(self, user_idx):
+        """
+        Get one user's ratings
+
+        Returns:
+            Tuple of (recipe indices, ratings) for the recipes the user rated
+        """
+        start, end = self.csr.indptr[user_idx], self.csr.indptr[user_idx + 1]
+        return self.csr.indices[start:end], self.csr.data[start:end]
+
+    def recipe_ratings(self, recipe_idx):
+        """
+        Get all ratings of one recipe
+
+        Returns:
+            Tuple of (user indices, ratings) for the users who rated the recipe
+        """
+        start, end = self.csc.indptr[recipe_idx], self.csc.indptr[recipe_idx + 1]
+        return self.csc.indices[start:end], self.csc.data[start:end]
+
+    def user_rows(self, user_ids):
+        """Get the CSR sub-matrix of the given users"""
+        return self.csr[np.asarray(user_ids, dtype=int)]
+
+    def recipe_columns(self, recipe_ids):
+        """Get the CSC sub-matrix of the given recipes"""
+        return self.csc[:, np.asarray(recipe_ids, dtype=int)]
+
+    def with_ratings(self, user_indices, recipe_indices, ratings):
+        """
+        Copy of the store with some ratings set
+
+        The store itself is never modified, so readers holding it are unaffected.
+        A rating of 0 removes the entry, user indices past the end add new users,
+        and only the touched users' and recipes' norms are recomputed.
+
+        Only the touched rows are rebuilt; the untouched ones are copied over in
+        contiguous slices. Being copy-on-write, every call still copies the CSR
+        arrays and rebuilds the CSC view, i.e. costs O(nnz) in memory traffic
+        regardless of how few ratings change, so callers should apply ratings
+        in batches rather than one at a time.
+
+        Args:
+            user_indices: User index of each rating
+            recipe_indices: Recipe index of each rating
+            ratings: Rating values; later entries win for repeated (user, recipe) pairs
+
+        Returns:
+            New RatingStore
+        """
+        user_indices = np.asarray(user_indices, dtype=int)
+        recipe_indices = np.asarray(recipe_indices, dtype=int)
+        ratings = np.asarray(ratings, dtype=np.float32)
+        if len(user_indices) == 0:
+            return self
+
+        # Keep only the last rating for each (user, recipe) pair, sorted by (user, recipe)
+        keys = user_indices * self.n_recipes + recipe_indices
+        _, last_from_end = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last_from_end
+        user_indices, recipe_indices, ratings = user_indices[last], recipe_indices[last], ratings[last]
+
+        n_users = max(self.n_users, int(user_indices.max()) + 1)
+        changed_users, starts = np.unique(user_indices, return_index=True)
+        ends = np.append(starts[1:], len(user_indices))
+
+        row_lengths = np.zeros(n_users, dtype=np.int64)
+        row_lengths[:self.n_users] = np.diff(self.csr.indptr)
+        indices, data = [], []
+        next_row = 0  # first old row not yet copied
+        for user, start, end in zip(changed_users, starts, ends):
+            # Untouched rows before this user, as one slice
+            stop = min(user, self.n_users)
+            if stop > next_row:
+                indices.append(self.csr.indices[self.csr.indptr[next_row]:self.csr.indptr[stop]])
+                data.append(self.csr.data[self.csr.indptr[next_row]:self.csr.indptr[stop]])
+            next_row = max(next_row, min(user + 1, self.n_users))
+
+            # This user's row: old ratings not being set, plus the new ratings
+            if user < self.n_users:
+                old_recipes, old_ratings = self.user_ratings(user)
+            else:
+                old_recipes, old_ratings = np.zeros(0, dtype=int), np.zeros(0, dtype=np.float32)
+            kept = ~np.isin(old_recipes, recipe_indices[start:end])
+            row_recipes = np.concatenate([old_recipes[kept], recipe_indices[start:end]])
+            row_ratings = np.concatenate([old_ratings[kept], ratings[start:end]])
+            order = np.argsort(row_recipes, kind='stable')
+            nonzero = row_ratings[order] != 0
+            indices.append(row_recipes[order][nonzero])
+            data.append(row_ratings[order][nonzero])
+            row_lengths[user] = np.count_nonzero(nonzero)
+
+        if self.n_users > next_row:
+            indices.append(self.csr.indices[self.csr.indptr[next_row]:])
+            data.append(self.csr.data[self.csr.indptr[next_row]:])
+
+        indptr = np.zeros(n_users + 1, dtype=self.csr.indptr.dtype)
+        np.cumsum(row_lengths, out=indptr[1:])
+        matrix = sparse.csr_matrix(
+            (np.concatenate(data).astype(np.float32, copy=False),
+             np.concatenate(indices).astype(self.csr.indices.dtype, copy=False), indptr),
+            shape=(n_users, self.n_recipes)
+        )
+
+        # Norms change only for the users and recipes in this batch
+        user_norms = np.zeros(n_users, dtype=self.user_norms.dtype)
+        user_norms[:self.n_users] = self.user_norms
+        changed_rows = matrix[changed_users]
+        user_norms[changed_users] = np.sqrt(np.asarray(changed_rows.multiply(changed_rows).sum(axis=1)).ravel())
+
+        store = RatingStore(matrix, user_norms=user_norms, recipe_norms=self.recipe_norms.copy())
+        changed_recipes = np.unique(recipe_indices)
+        changed_columns = store.csc[:, changed_recipes]
+        store.recipe_norms[changed_recipes] = np.sqrt(
+            np.asarray(changed_columns.multiply(changed_columns).sum(axis=0)).ravel()
+        )
+        return store
+
+    def user_similarity(self, user_ids):
+        """
+        Cosine similarity between the given users and every user
+
+        Only users sharing at least one rated recipe produce non-zero entries,
+        so the sparse product touches ratings, not users x recipes cells.
+
+        Args:
+            user_ids: List of user indices
+
+        Returns:
+            Dense array of shape (len(user_ids), n_users)
+        """
+        user_ids = np.asarray(user_ids, dtype=int)
+        # csc.T is the transpose already in CSR form, so no O(nnz) conversion per call
+        dot_products = (self.csr[user_ids] @ self.csc.T).toarray()
+        return _scale_to_cosine(dot_products, self.user_norms[user_ids], self.user_norms)
+
+    def recipe_similarity(self, recipe_ids):
+        """
+        Cosine similarity between the given recipes and every recipe,
+        computed from the columns of the rating matrix
+
+        Args:
+            recipe_ids: List of recipe indices
+
+        Returns:
+            Dense array of shape (len(recipe_ids), n_recipes)
+        """
+        recipe_ids = np.asarray(recipe_ids, dtype=int)
+        dot_products = (self.csc[:, recipe_ids].T @ self.csr).toarray()
+        return _scale_to_cosine(dot_products, self.recipe_norms[recipe_ids], self.recipe_norms)
+
+    def save(self, filepath):
+        """Save the ratings as a compressed sparse .npz file"""
+        sparse.save_npz(filepath, self.csr)
+
+    @classmethod
+    def load(cls, filepath):
+        """Load ratings saved with save()"""
+        return cls(sparse.load_npz(filepath))
@@ -0,0 +1,192 @@
+"""
+Recipe Catalog
+One in-memory copy of the recipes with O(1) id lookup and cuisine and
+ingredient indexes, shared by every model instead of each loading its own list
+"""
+
+import threading
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from .world_recipes_data import get_world_recipes
+except ImportError:
+    from world_recipes_data import get_world_recipes
+
+
+class RecipeCatalog:
+    """
+    Recipes indexed by id, name, cuisine and ingredient
+
+    Recipes are stored once, in insertion order; every index holds recipe ids.
+    The version counter increases on every change so models can tell when
+    anything they derived from the catalog is stale.
+    """
+
+    def __init__(self, recipes=None):
+        """
+        Initialize the catalog
+
+        Args:
+            recipes: Optional list of recipe dictionaries with at least an 'id'
+        """
+        self.recipes = []
+        self.id_index = {}  # recipe id -> position in self.recipes
+        self.name_index = {}  # lowercase name -> recipe id
+        self.cuisine_index = defaultdict(list)  # cuisine -> recipe ids
+        self.ingredient_index = defaultdict(list)  # ingredient -> recipe ids (postings)
+        self.version = 0
+        self._cooccurrence = None  # (version, vocabulary, co-occurrence, counts)
+
+        if recipes:
+            self.add_recipes(recipes)
+
+    def add_recipes(self, recipes):
+        """
+        Add recipes and index them
+
+        Every id is checked before anything is indexed, so a rejected batch
+        leaves the catalog (and its version) unchanged.
+
+        Raises:
+            ValueError: If a recipe id is already in the catalog or repeated in the batch
+        """
+        recipes = list(recipes)
+        seen = set()
+        for recipe in recipes:
+            if recipe['id'] in self.id_index:
+                raise ValueError(f"Recipe ID {recipe['id']} already in catalog")
+            if recipe['id'] in seen:
+                raise ValueError(f"Recipe ID {recipe['id']} repeated in batch")
+            seen.add(recipe['id'])
+
+        for recipe in recipes:
+            self.id_index[recipe['id']] = len(self.recipes)
+            self.recipes.append(recipe)
+
+            if 'name' in recipe:
+                self.name_index[recipe['name'].lower()] = recipe['id']
+            if 'cuisine' in recipe:
+                self.cuisine_index[recipe['cuisine']].append(recipe['id'])
+            for ingredient in dict.fromkeys(recipe.get('ingredients', [])):
+                self.ingredient_index[ingredient.lower().strip()].append(recipe['id'])
+
+        self.version += 1
+        return self
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def __iter__(self):
+        return iter(self.recipes)
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self.id_index
+
+    def get(self, recipe_id):
+        """Get a recipe by id (None if missing)"""
+        position = self.id_index.get(recipe_id)
+        return None if position is None else self.recipes[position]
+
+    def get_by_name(self, name):
+        """Get a recipe by case-insensitive name (None if missing)"""
+        recipe_id = self.name_index.get(name.lower())
+        return None if recipe_id is None else self.get(recipe_id)
+
+    def position(self, recipe_id):
+        """Position of a recipe in insertion order (None if missing)"""
+        return self.id_index.get(recipe_id)
+
+    def ids_for_cuisine(self, cuisine):
+        """Ids of the recipes of one cuisine"""
+        return self.cuisine_index.get(cuisine, [])
+
+    def ids_with_ingredient(self, ingredient):
+        """Ids of the recipes using an ingredient (case-insensitive)"""
+        return self.ingredient_index.get(ingredient.lower().strip(), [])
+
+    def cuisines(self):
+        """Sorted list of cuisines"""
+        return sorted(self.cuisine_index)
+
+    def ingredients(self):
+        """Sorted ingredient vocabulary"""
+        return sorted(self.ingredient_index)
+
+    def ingredient_incidence(self, vocabulary=None):
+        """
+        Sparse recipe x ingredient incidence matrix
+
+        Args:
+            vocabulary: Ingredient -> column mapping (default: sorted ingredient vocabulary)
+
+        Returns:
+            CSR int32 matrix with a 1 where a recipe (by position) uses an ingredient
+        """
+        if vocabulary is None:
+            vocabulary = {ing: idx for idx, ing in enumerate(self.ingredients())}
+
+        indptr, indices = [0], []
+        for recipe in self.recipes:
+            ingredients = set(ing.lower().strip() for ing in recipe.get('ingredients', []))
+            indices.extend(sorted(vocabulary[ing] for ing in ingredients if ing in vocabulary))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csr_matrix((data, np.array(indices, dtype=np.int32), np.array(indptr)),
+                                 shape=(len(self.recipes), len(vocabulary)))
+
+    def ingredient_cooccurrence(self, chunk_size=10000):
+        """
+        How often each pair of ingredients appears in the same recipe
+
+        Computed as X^T X of the incidence matrix, chunk_size recipes at a
+        time, and cached until the catalog changes.
+
+        Returns:
+            Tuple of (vocabulary list, CSR int32 co-occurrence matrix with an
+            empty diagonal, recipe count of each ingredient)
+        """
+        if self._cooccurrence is not None and self._cooccurrence[0] == self.version:
+            return self._cooccurrence[1:]
+
+        vocabulary = self.ingredients()
+        incidence = self.ingredient_incidence({ing: idx for idx, ing in enumerate(vocabulary)})
+
+        cooccurrence = sparse.csr_matrix((len(vocabulary), len(vocabulary)), dtype=np.int32)
+        for start in range(0, incidence.shape[0], chunk_size):
+            chunk = incidence[start:start + chunk_size]
+            cooccurrence = cooccurrence + (chunk.T @ chunk).tocsr()
+
+        counts = np.asarray(incidence.sum(axis=0)).ravel()
+        cooccurrence.setdiag(0)
+        cooccurrence.eliminate_zeros()
+
+        self._cooccurrence = (self.version, vocabulary, cooccurrence, counts)
+        return self._cooccurrence[1:]
+
+
+# Global instance
+_world_catalog = None
+_world_catalog_lock = threading.Lock()
+
+def get_world_catalog():
+    """Get or create the shared catalog of world recipes"""
+    global _world_catalog
+
+    with _world_catalog_lock:
+        if _world_catalog is None:
+            _world_catalog = RecipeCatalog(get_world_recipes())
+
+    return _world_catalog
+
+
+if __name__ == '__main__':
+    catalog = get_world_catalog()
+    print(f"Recipes: {len(catalog)}")
+    print(f"Cuisines: {len(catalog.cuisines())}")
+    print(f"Ingredients: {len(catalog.ingredients())}")
+    print(f"Recipe 1: {catalog.get(1)['name']}")
+    print(f"Recipes with garlic: {len(catalog.ids_with_ingredient('garlic'))}")
@@ -4,22 +4,140 @@ Uses collaborative filtering to recommend recipes based on user preferences
 """
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import joblib
 import os
+import threading
+import time
+
+try:
+    from .rating_store import RatingStore
+    from .neighbors import UserNeighborhoodIndex, ItemNeighborhoodIndex, top_k_from_block
+    from .blocked_similarity import blocked_top_k, prepare_features, similarity_block
+    from .matrix_factorization import ALSMatrixFactorization
+    from .ann_index import ExactIndex, RandomProjectionLSH
+    from .recipe_catalog import RecipeCatalog
+    from .ingredient_search import IngredientSearchEngine
+except ImportError:
+    from rating_store import RatingStore
+    from neighbors import UserNeighborhoodIndex, ItemNeighborhoodIndex, top_k_from_block
+    from blocked_similarity import blocked_top_k, prepare_features, similarity_block
+    from matrix_factorization import ALSMatrixFactorization
+    from ann_index import ExactIndex, RandomProjectionLSH
+    from recipe_catalog import RecipeCatalog
+    from ingredient_search import IngredientSearchEngine
+
+
+class RatingSnapshot:
+    """
+    Ratings and the neighbor lists and factors derived from them
+
+    Never modified once published: add_ratings() builds the next snapshot on
+    copies and swaps it in with one assignment, so a reader that takes the
+    snapshot once scores against matching ratings, neighbors and factors.
+    """
+
+    __slots__ = ('ratings', 'user_neighbors', 'item_neighbors', 'factor_model')
+
+    def __init__(self, ratings=None, user_neighbors=None, item_neighbors=None, factor_model=None):
+        self.ratings = ratings
+        self.user_neighbors = user_neighbors
+        self.item_neighbors = item_neighbors
+        self.factor_model = factor_model
+
+    def replace(self, **fields):
+        """Copy of the snapshot with some fields replaced"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(fields)
+        return RatingSnapshot(**values)
+
+    def with_ratings(self, user_indices, recipe_indices, ratings):
+        """
+        Next snapshot after setting some ratings
+
+        This snapshot stays valid for its readers: the new one shares its
+        neighbor lists and user factors and duplicates only the row blocks it
+        refreshes. Per call this costs
+          - O(nnz) for the new rating store (CSR copy and CSC rebuild),
+          - one similarity row per changed row and per list that contained a
+            changed row (found through the reverse-neighbor index), each as
+            wide as the number of users or recipes,
+          - O(touched row blocks x block rows x K) for the copied lists and
+            O(touched users x n_factors) for the re-solved factors.
+        """
+        store = self.ratings.with_ratings(user_indices, recipe_indices, ratings)
+        user_neighbors, item_neighbors, factor_model = self.user_neighbors, self.item_neighbors, self.factor_model
+        if user_neighbors is not None:
+            user_neighbors = user_neighbors.copy().refresh(store, user_indices)
+        if item_neighbors is not None:
+            item_neighbors = item_neighbors.copy().refresh(store, recipe_indices)
+        if factor_model is not None:
+            factor_model = factor_model.copy().update_users(store, user_indices)
+        return RatingSnapshot(store, user_neighbors, item_neighbors, factor_model)
+
+
+def _snapshot_field(name):
+    """Attribute read from the current RatingSnapshot; setting it publishes a new snapshot"""
+    return property(
+        lambda self: getattr(self.snapshot, name),
+        lambda self, value: setattr(self, 'snapshot', self.snapshot.replace(**{name: value}))
+    )
 
 
 class RecipeRecommender:
     """
     Collaborative Filtering Recipe Recommender
-    Uses user-item rating matrix and cosine similarity
+    Uses a sparse user-item rating store and cosine similarity
     """
     
-    def __init__(self):
+    # Collaborative method -> recommendation type reported to clients
+    COLLABORATIVE_METHODS = {
+        'user': 'collaborative_filtering',
+        'item': 'item_based_collaborative_filtering',
+        'als': 'matrix_factorization'
+    }
+    
+    # Rating state lives in one RatingSnapshot, replaced as a whole on updates
+    ratings = _snapshot_field('ratings')
+    user_neighbors = _snapshot_field('user_neighbors')
+    item_neighbors = _snapshot_field('item_neighbors')
+    factor_model = _snapshot_field('factor_model')
+    
+    def __init__(self, n_user_neighbors=50, n_item_neighbors=50, n_factors=8,
+                 n_content_neighbors=50, block_size=1024, n_jobs=1, content_index=None):
+        """
+        Initialize the recommender
+        
+        Args:
+            n_user_neighbors: Number of most similar users kept per user (default: 50)
+            n_item_neighbors: Number of most similar recipes kept per recipe (default: 50)
+            n_factors: Rank of the ALS matrix factorization model (default: 8)
+            n_content_neighbors: Number of most similar recipes kept per recipe for
+                                 content-based filtering (default: 50)
+            block_size: Recipes per block when building content neighbors (default: 1024)
+            n_jobs: Worker processes for building content and rating neighborhoods (default: 1)
+            content_index: Nearest-neighbor index for content-based filtering, e.g.
+                           'exact', 'lsh' or an ExactIndex / RandomProjectionLSH
+                           instance (default: None = precomputed top-K lists)
+        """
+        self.n_user_neighbors = n_user_neighbors
+        self.n_item_neighbors = n_item_neighbors
+        self.n_factors = n_factors
+        self.n_content_neighbors = n_content_neighbors
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.snapshot = RatingSnapshot()
         self.recipes = []
-        self.user_item_matrix = None
+        self.catalog = RecipeCatalog()
+        self.search_engine = None
+        self.recipe_index = {}  # recipe id -> row/column index
+        self._write_lock = threading.Lock()
         self.recipe_features = None
-        self.similarity_matrix = None
+        self.content_neighbors = None
+        if content_index == 'exact':
+            content_index = ExactIndex()
+        elif content_index == 'lsh':
+            content_index = RandomProjectionLSH()
+        self.content_index = content_index
         
     def create_sample_data(self):
         """Create sample recipe dataset with user ratings"""
@@ -134,8 +252,8 @@ class RecipeRecommender:
         ]
         
         # User-Item Rating Matrix (10 users x 15 recipes)
-        # Ratings: 0 = not rated, 1-5 = user rating
-        self.user_item_matrix = np.array([
+        # Ratings: 0 = not rated, 1-5 = user rating (stored sparsely)
+        self.ratings = RatingStore.from_dense([
             [5, 0, 4, 0, 3, 0, 0, 4, 0, 5, 0, 0, 4, 0, 5],  # User 1: Likes healthy food
             [0, 5, 0, 4, 5, 0, 0, 5, 0, 0, 4, 0, 0, 0, 0],  # User 2: Likes Italian
             [4, 0, 5, 0, 0, 5, 0, 0, 0, 5, 0, 4, 5, 0, 5],  # User 3: Likes healthy/light
@@ -148,6 +266,8 @@ class RecipeRecommender:
             [0, 0, 0, 5, 0, 0, 5, 0, 5, 0, 0, 5, 4, 0, 0]   # User 10: Likes spicy food
         ])
         
+        self._index_recipes()
+        
         # Extract recipe features for content-based similarity
         self.recipe_features = np.array([recipe['features'] for recipe in self.recipes])
         
@@ -158,80 +278,284 @@ class RecipeRecommender:
         # Create sample data
         self.create_sample_data()
         
-        # Calculate recipe similarity matrix using cosine similarity
-        # Based on recipe features (content-based approach)
-        self.similarity_matrix = cosine_similarity(self.recipe_features)
+        # Top-K cosine neighbors of each recipe based on recipe features
+        # (content-based approach), built block by block so the full
+        # recipes x recipes similarity matrix never exists in memory.
+        # With a nearest-neighbor index, neighbors are found at query time instead.
+        if self.content_index is not None:
+            self.content_index.build(self.recipe_features)
+        else:
+            self.content_neighbors = self.build_content_neighbors()
+        
+        # Precompute each user's top-K most similar users
+        self.user_neighbors = UserNeighborhoodIndex(k=self.n_user_neighbors, n_jobs=self.n_jobs).build(self.ratings)
+        
+        # Precompute each recipe's top-K most similar recipes (item-item filtering)
+        self.item_neighbors = ItemNeighborhoodIndex(k=self.n_item_neighbors, n_jobs=self.n_jobs).build(self.ratings)
         
+        # Latent-factor model for matrix factorization recommendations
+        self.factor_model = ALSMatrixFactorization(n_factors=self.n_factors).fit(self.ratings)
+        
+        stats = self.user_neighbors.stats
         print(f"✅ Trained on {len(self.recipes)} recipes")
-        print(f"✅ User-Item matrix shape: {self.user_item_matrix.shape}")
+        print(f"✅ User-Item matrix shape: {self.ratings.shape} ({self.ratings.nnz} ratings)")
+        print(f"✅ Top-{stats['k']} user neighborhoods built in {stats['build_seconds']*1000:.1f} ms "
+              f"({stats['index_bytes']} bytes)")
+        stats = self.item_neighbors.stats
+        print(f"✅ Top-{stats['k']} item neighborhoods built in {stats['build_seconds']*1000:.1f} ms "
+              f"({stats['index_bytes']} bytes)")
+        print(f"✅ ALS factors (rank {self.n_factors}) trained in {self.factor_model.train_seconds*1000:.1f} ms")
         
         return self
         
-    def get_user_based_recommendations(self, user_id, top_n=5):
+    def get_user_based_recommendations(self, user_id, top_n=5, method='user'):
         """
         Collaborative Filtering: Recommend recipes based on similar users' preferences
         
         Args:
             user_id: User ID (0-9 for sample data)
             top_n: Number of recommendations to return
+            method: 'user' (similar users), 'item' (recipes similar to the user's rated
+                    ones) or 'als' (matrix factorization)
         
         Returns:
             List of recommended recipe dictionaries
         """
-        if user_id >= len(self.user_item_matrix):
-            raise ValueError(f"User ID must be between 0 and {len(self.user_item_matrix)-1}")
-        
-        # Get user's ratings
-        user_ratings = self.user_item_matrix[user_id]
-        
-        # Calculate user similarity (collaborative filtering)
-        user_similarity = cosine_similarity([user_ratings], self.user_item_matrix)[0]
-        
-        # Get predicted ratings for unrated recipes
-        predicted_ratings = []
-        
-        for recipe_idx in range(len(self.recipes)):
-            if user_ratings[recipe_idx] == 0:  # Not yet rated by user
-                # Weighted average of ratings from similar users
-                similar_users_ratings = []
-                
-                for other_user_idx in range(len(self.user_item_matrix)):
-                    if other_user_idx != user_id and self.user_item_matrix[other_user_idx][recipe_idx] > 0:
-                        similar_users_ratings.append({
-                            'rating': self.user_item_matrix[other_user_idx][recipe_idx],
-                            'similarity': user_similarity[other_user_idx]
-                        })
-                
-                if similar_users_ratings:
-                    # Calculate weighted rating
-                    total_similarity = sum(r['similarity'] for r in similar_users_ratings)
-                    if total_similarity > 0:
-                        predicted_rating = sum(
-                            r['rating'] * r['similarity'] for r in similar_users_ratings
-                        ) / total_similarity
-                    else:
-                        predicted_rating = 0
-                else:
-                    predicted_rating = 0
-                
-                predicted_ratings.append({
-                    'recipe': self.recipes[recipe_idx],
-                    'predicted_rating': predicted_rating
-                })
-        
-        # Sort by predicted rating
-        predicted_ratings.sort(key=lambda x: x['predicted_rating'], reverse=True)
-        
-        # Return top N recommendations
+        return self.get_batch_user_recommendations([user_id], top_n, method)[0]
+    
+    def get_batch_user_recommendations(self, user_ids, top_n=5, method='user'):
+        """
+        Collaborative Filtering for many users at once
+        
+        Args:
+            user_ids: List of user IDs
+            top_n: Number of recommendations per user
+            method: 'user', 'item' or 'als' (see get_user_based_recommendations)
+        
+        Returns:
+            List of recommendation lists, in the same order as user_ids
+        """
+        if method not in self.COLLABORATIVE_METHODS:
+            raise ValueError(f"Method must be one of: {', '.join(self.COLLABORATIVE_METHODS)}")
+        
+        # Work on one snapshot: concurrent add_ratings() calls swap in a new one
+        snapshot = self.snapshot
+        ratings = snapshot.ratings
+        for user_id in user_ids:
+            if user_id >= ratings.n_users:
+                raise ValueError(f"User ID must be between 0 and {ratings.n_users-1}")
+        
+        recommendation_type = self.COLLABORATIVE_METHODS[method]
+        
+        if method == 'als':
+            recommendations = []
+            for user_id in user_ids:
+                rated_indices, _ = ratings.user_ratings(user_id)
+                indices, scores = snapshot.factor_model.recommend(user_id, top_n, exclude=rated_indices)
+                recommendations.append(self._format_recommendations(indices, scores, recommendation_type))
+            return recommendations
+        
+        if method == 'item':
+            predicted_ratings = self.predict_item_based_ratings(user_ids, snapshot)
+        else:
+            predicted_ratings = self.predict_ratings(user_ids, snapshot)
+        
+        return [
+            self._build_user_recommendations(ratings, user_id, predicted, top_n, recommendation_type)
+            for user_id, predicted in zip(user_ids, predicted_ratings)
+        ]
+    
+    def predict_ratings(self, user_ids, snapshot=None):
+        """
+        Predict ratings of every recipe for a batch of users
+        
+        Each prediction is the similarity-weighted average of the ratings given
+        by the other users who rated that recipe, computed for all users and
+        recipes with two matrix products instead of per-recipe loops. Once the
+        neighborhood index is built only each user's top-K neighbors are used.
+        
+        Args:
+            user_ids: List of user IDs
+            snapshot: RatingSnapshot to score against (default: the current one);
+                      a bare RatingStore is scored without precomputed neighbors
+        
+        Returns:
+            Array of shape (len(user_ids), n_recipes) with predicted ratings
+            (0 where no similar user rated the recipe)
+        """
+        user_ids = np.asarray(user_ids, dtype=int)
+        snapshot = self._snapshot(snapshot)
+        ratings = snapshot.ratings
+        
+        if snapshot.user_neighbors is not None:
+            # Sparse weights: only the precomputed top-K neighbors of each user
+            user_similarity = snapshot.user_neighbors.weights(user_ids, ratings.n_users)
+        else:
+            # Similarity of each requested user to every user, excluding themselves
+            user_similarity = ratings.user_similarity(user_ids)
+            user_similarity[np.arange(len(user_ids)), user_ids] = 0
+        
+        # Numerator: sum(similarity * rating); denominator: sum(similarity) over raters only
+        weighted_ratings = _to_array(user_similarity @ ratings.csr)
+        total_similarity = _to_array(user_similarity @ ratings.rated)
+        
+        predicted_ratings = np.zeros_like(weighted_ratings, dtype=float)
+        np.divide(weighted_ratings, total_similarity, out=predicted_ratings, where=total_similarity > 0)
+        
+        return predicted_ratings
+    
+    def predict_item_based_ratings(self, user_ids, snapshot=None):
+        """
+        Item-based prediction: similarity-weighted average of the user's own
+        ratings over the precomputed neighbors of the recipes they rated
+        
+        Only the neighbor lists of rated recipes are read, so the cost depends
+        on how many ratings the users have, not on the number of users.
+        
+        Args:
+            user_ids: List of user IDs
+            snapshot: RatingSnapshot to score against (default: the current one);
+                      a bare RatingStore uses full recipe similarity rows
+        
+        Returns:
+            Array of shape (len(user_ids), n_recipes) with predicted ratings
+        """
+        snapshot = self._snapshot(snapshot)
+        ratings = snapshot.ratings
+        user_rows = ratings.user_rows(user_ids)
+        
+        # Neighbor lists of every recipe rated by these users
+        rated_recipes = np.unique(user_rows.indices)
+        if snapshot.item_neighbors is not None:
+            neighbor_weights = snapshot.item_neighbors.weights(rated_recipes, ratings.n_recipes)
+        else:
+            neighbor_weights = ratings.recipe_similarity(rated_recipes)
+            neighbor_weights[np.arange(len(rated_recipes)), rated_recipes] = 0
+        
+        user_rows = user_rows[:, rated_recipes]
+        rated_mask = user_rows.copy()
+        rated_mask.data[:] = 1
+        
+        weighted_ratings = _to_array(user_rows @ neighbor_weights)
+        total_similarity = _to_array(rated_mask @ neighbor_weights)
+        
+        predicted_ratings = np.zeros_like(weighted_ratings, dtype=float)
+        np.divide(weighted_ratings, total_similarity, out=predicted_ratings, where=total_similarity > 0)
+        
+        return predicted_ratings
+    
+    def _snapshot(self, snapshot=None):
+        """The current snapshot, or the given one (a bare RatingStore becomes a snapshot without neighbors)"""
+        if snapshot is None:
+            return self.snapshot
+        if isinstance(snapshot, RatingStore):
+            return RatingSnapshot(snapshot)
+        return snapshot
+    
+    def _build_user_recommendations(self, ratings, user_id, predicted_ratings, top_n,
+                                    recommendation_type='collaborative_filtering'):
+        """Rank the user's unrated recipes by predicted rating and format the top N"""
+        rated_indices, _ = ratings.user_ratings(user_id)
+        unrated_mask = np.ones(ratings.n_recipes, dtype=bool)
+        unrated_mask[rated_indices] = False
+        unrated_indices = np.flatnonzero(unrated_mask)
+        
+        # Stable sort keeps catalog order for equal predictions; rounding absorbs
+        # floating-point noise so exact ties are not reordered by summation order
+        order = np.argsort(-np.round(predicted_ratings[unrated_indices], 6), kind='stable')
+        top_indices = unrated_indices[order][:top_n]
+        
+        return self._format_recommendations(top_indices, predicted_ratings[top_indices], recommendation_type)
+    
+    def _format_recommendations(self, recipe_indices, predicted_ratings, recommendation_type):
+        """Copy the recipes at the given indices and attach their predicted ratings"""
         recommendations = []
-        for item in predicted_ratings[:top_n]:
-            recipe = item['recipe'].copy()
-            recipe['predicted_rating'] = round(item['predicted_rating'], 2)
-            recipe['recommendation_type'] = 'collaborative_filtering'
+        for recipe_idx, predicted_rating in zip(recipe_indices, predicted_ratings):
+            recipe = self.recipes[recipe_idx].copy()
+            recipe['predicted_rating'] = round(float(predicted_rating), 2)
+            recipe['recommendation_type'] = recommendation_type
             recommendations.append(recipe)
         
         return recommendations
     
+    def add_ratings(self, batch, batch_size=1000):
+        """
+        Add or update user ratings without retraining
+        
+        Ratings are applied in micro-batches. Each micro-batch builds the next
+        RatingSnapshot on copies: a new rating store with only the touched rows
+        and norms rebuilt, then the affected neighbor lists and user factors
+        refreshed. The snapshot is published with one assignment, so readers
+        never take the lock and always see ratings, neighbors and factors that
+        belong together. Neighbor lists and user factors are shared with the
+        previous snapshot except for the rows refreshed, but every micro-batch
+        still copies the rating store (O(ratings)), so larger batches amortize
+        that copy (see RatingSnapshot.with_ratings for the full cost).
+        
+        Args:
+            batch: List of dicts with 'user_id', 'recipe_id' and 'rating' (1-5).
+                   A user_id equal to the current user count creates a new user.
+            batch_size: Number of ratings applied per micro-batch
+        
+        Returns:
+            Dictionary summarizing the update
+        """
+        start_time = time.perf_counter()
+        
+        with self._write_lock:
+            user_indices, recipe_indices, values = self._validate_ratings(batch)
+            snapshot = self.snapshot
+            n_users_before = snapshot.ratings.n_users
+            
+            for start in range(0, len(values), batch_size):
+                end = start + batch_size
+                snapshot = snapshot.with_ratings(
+                    user_indices[start:end], recipe_indices[start:end], values[start:end]
+                )
+                self.snapshot = snapshot
+            
+            return {
+                'ratings_applied': len(values),
+                'new_users': snapshot.ratings.n_users - n_users_before,
+                'total_users': snapshot.ratings.n_users,
+                'total_ratings': snapshot.ratings.nnz,
+                'update_seconds': round(time.perf_counter() - start_time, 4)
+            }
+    
+    def _validate_ratings(self, batch):
+        """Convert a list of rating dicts to index arrays, raising ValueError on bad input"""
+        user_indices, recipe_indices, values = [], [], []
+        next_user = self.ratings.n_users
+        
+        for entry in batch:
+            try:
+                user_id = int(entry['user_id'])
+                recipe_id = int(entry['recipe_id'])
+                rating = float(entry['rating'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Each rating needs numeric 'user_id', 'recipe_id' and 'rating'")
+            
+            if user_id < 0 or user_id > next_user:
+                raise ValueError(f"User ID must be between 0 and {next_user}")
+            if recipe_id not in self.recipe_index:
+                raise ValueError(f"Recipe ID {recipe_id} not found")
+            if not 1 <= rating <= 5:
+                raise ValueError("Rating must be between 1 and 5")
+            
+            next_user = max(next_user, user_id + 1)
+            user_indices.append(user_id)
+            recipe_indices.append(self.recipe_index[recipe_id])
+            values.append(rating)
+        
+        return np.array(user_indices, dtype=int), np.array(recipe_indices, dtype=int), np.array(values)
+    
+    def build_content_neighbors(self):
+        """Build the top-K content similarity lists from the recipe features"""
+        return blocked_top_k(
+            self.recipe_features, self.n_content_neighbors, metric='cosine',
+            n_jobs=self.n_jobs, block_rows=self.block_size
+        )
+    
     def get_content_based_recommendations(self, recipe_id, top_n=5):
         """
         Content-Based Filtering: Recommend similar recipes based on features
@@ -244,65 +568,162 @@ class RecipeRecommender:
             List of similar recipe dictionaries
         """
         # Find recipe index
-        recipe_idx = None
-        for idx, recipe in enumerate(self.recipes):
-            if recipe['id'] == recipe_id:
-                recipe_idx = idx
-                break
+        recipe_idx = self.recipe_index.get(recipe_id)
         
         if recipe_idx is None:
             raise ValueError(f"Recipe ID {recipe_id} not found")
         
-        # Get similarity scores for this recipe
-        similarities = self.similarity_matrix[recipe_idx]
-        
-        # Get indices of similar recipes (excluding itself)
-        similar_indices = np.argsort(similarities)[::-1][1:top_n+1]
+        similar_indices, similarities = self.find_similar_recipes(recipe_idx, top_n)
         
         # Build recommendations
         recommendations = []
-        for idx in similar_indices:
+        for idx, similarity in zip(similar_indices, similarities):
             recipe = self.recipes[idx].copy()
-            recipe['similarity_score'] = round(similarities[idx], 2)
+            recipe['similarity_score'] = round(float(similarity), 2)
             recipe['recommendation_type'] = 'content_based'
             recommendations.append(recipe)
         
         return recommendations
     
+    def find_similar_recipes(self, recipe_idx, top_n):
+        """
+        Most similar recipes by content, excluding the recipe itself and
+        recipes with no positive similarity
+
+        Requests for more than the n_content_neighbors precomputed neighbors
+        score the recipe against the whole catalog instead of being cut at K.
+
+        Returns:
+            Tuple of (recipe indices, similarities) sorted by descending similarity
+        """
+        if self.content_index is None:
+            if top_n > self.content_neighbors.k:
+                return self._exact_similar_recipes(recipe_idx, top_n)
+            
+            # Precomputed neighbors, already sorted and excluding the recipe itself
+            similar_indices, similarities = self.content_neighbors.neighbors(recipe_idx)
+            return similar_indices[:top_n], similarities[:top_n]
+        
+        similar_indices, similarities = self.content_index.query(
+            self.recipe_features[recipe_idx], top_n + 1
+        )
+        keep = (similar_indices != recipe_idx) & (similarities > 0)
+        return similar_indices[keep][:top_n], similarities[keep][:top_n]
+    
+    def _exact_similar_recipes(self, recipe_idx, top_n):
+        """Top-N content neighbors of one recipe from a full similarity row"""
+        # Never more neighbors than other recipes, whatever top_n the request asked for
+        top_n = min(top_n, len(self.recipes) - 1)
+        if top_n <= 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        features = prepare_features(self.recipe_features, 'cosine')
+        similarity = similarity_block(features[[recipe_idx]], features, 'cosine')
+        indices, scores = top_k_from_block(similarity, [recipe_idx], top_n)
+        valid = indices[0] >= 0
+        return indices[0][valid], scores[0][valid]
+    
+    def get_neighborhood_stats(self):
+        """Build time, size and last refresh cost of the user and item neighborhood indexes"""
+        snapshot = self.snapshot
+        stats = {}
+        if snapshot.user_neighbors is not None:
+            stats['user'] = dict(snapshot.user_neighbors.stats)
+        if snapshot.item_neighbors is not None:
+            stats['item'] = dict(snapshot.item_neighbors.stats)
+        return stats
+    
     def get_all_recipes(self):
         """Return all available recipes"""
         return self.recipes
     
     def get_recipe_by_id(self, recipe_id):
         """Get a specific recipe by ID"""
-        for recipe in self.recipes:
-            if recipe['id'] == recipe_id:
-                return recipe
-        return None
+        return self.catalog.get(recipe_id)
+    
+    def _index_recipes(self):
+        """
+        Wrap the recipes in a catalog; a recipe's catalog position is its
+        column in the rating matrix
+        """
+        self.catalog = RecipeCatalog(self.recipes)
+        self.recipe_index = self.catalog.id_index
+        self.search_engine = IngredientSearchEngine(self.catalog)
+    
+    def search_by_ingredients(self, ingredients, top_n=10):
+        """
+        Recipes that use the most of the given ingredients
+        
+        Returns:
+            Tuple of (results, total_matches), see IngredientSearchEngine.search
+        """
+        return self.search_engine.search(ingredients, top_n)
     
     def save_model(self, filepath):
         """Save the trained model"""
+        snapshot = self.snapshot
         model_data = {
             'recipes': self.recipes,
-            'user_item_matrix': self.user_item_matrix,
+            'ratings': snapshot.ratings,
             'recipe_features': self.recipe_features,
-            'similarity_matrix': self.similarity_matrix
+            'content_neighbors': self.content_neighbors,
+            'content_index': self.content_index,
+            'user_neighbors': snapshot.user_neighbors,
+            'item_neighbors': snapshot.item_neighbors,
+            'factor_model': snapshot.factor_model
         }
         joblib.dump(model_data, filepath)
         print(f"Model saved to {filepath}")
     
     def load_model(self, filepath):
-        """Load a trained model"""
+        """
+        Load a trained model
+        
+        Models saved before the sparse rating store (dense 'user_item_matrix'
+        and 'similarity_matrix') are converted, and any neighbor lists or
+        factors they lack are rebuilt from the ratings and recipe features.
+        
+        Raises:
+            ValueError: If the file holds neither a rating store nor a dense rating matrix
+        """
         if os.path.exists(filepath):
             model_data = joblib.load(filepath)
+            if 'ratings' in model_data:
+                ratings = model_data['ratings']
+            elif 'user_item_matrix' in model_data:
+                ratings = RatingStore.from_dense(model_data['user_item_matrix'])
+            else:
+                raise ValueError(f"Unrecognized model format in {filepath}: no 'ratings' or 'user_item_matrix'")
+            
             self.recipes = model_data['recipes']
-            self.user_item_matrix = model_data['user_item_matrix']
+            self.ratings = ratings
             self.recipe_features = model_data['recipe_features']
-            self.similarity_matrix = model_data['similarity_matrix']
+            self.content_neighbors = model_data.get('content_neighbors')
+            self.content_index = model_data.get('content_index')
+            self.user_neighbors = model_data.get('user_neighbors')
+            self.item_neighbors = model_data.get('item_neighbors')
+            self.factor_model = model_data.get('factor_model')
+            self._index_recipes()
+            self._rebuild_missing()
             print(f"Model loaded from {filepath}")
         else:
             print(f"No saved model found at {filepath}")
             self.train()
+    
+    def _rebuild_missing(self):
+        """Build whatever train() would have built but a loaded model lacks"""
+        if self.content_index is None and self.content_neighbors is None:
+            self.content_neighbors = self.build_content_neighbors()
+        if self.user_neighbors is None:
+            self.user_neighbors = UserNeighborhoodIndex(k=self.n_user_neighbors, n_jobs=self.n_jobs).build(self.ratings)
+        if self.item_neighbors is None:
+            self.item_neighbors = ItemNeighborhoodIndex(k=self.n_item_neighbors, n_jobs=self.n_jobs).build(self.ratings)
+        if self.factor_model is None:
+            self.factor_model = ALSMatrixFactorization(n_factors=self.n_factors).fit(self.ratings)
+
+
+def _to_array(matrix):
+    """Convert the result of a (possibly sparse) product to a dense array"""
+    return matrix.toarray() if hasattr(matrix, 'toarray') else np.asarray(matrix)
 
 
 # Test the recommender
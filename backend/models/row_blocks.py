@@ -0,0 +1,136 @@
+"""
+Copy-on-Write Row Blocks
+A 2-D array stored as fixed-size blocks of rows. Copies share every block
+and a block is only duplicated the first time one of its rows is written,
+so copying costs O(n_rows / block_rows) and refreshing a few rows costs
+O(touched blocks x block_rows) instead of a copy of the whole array
+"""
+
+import numpy as np
+
+
+BLOCK_ROWS = 256
+
+
+class RowBlocks:
+    """
+    (n_rows x width) array split into blocks of block_rows rows
+    Readers index it like an array; writers go through assign() / writable_row()
+    """
+
+    def __init__(self, array, block_rows=BLOCK_ROWS):
+        """
+        Wrap an array without copying it (the blocks are views)
+
+        Args:
+            array: 2-D array of rows
+            block_rows: Rows per block
+        """
+        array = np.asarray(array)
+        self.block_rows = block_rows
+        self.width = array.shape[1]
+        self.dtype = array.dtype
+        self._blocks = [array[start:start + block_rows] for start in range(0, len(array), block_rows)]
+        self._n_rows = len(array)
+        self._owned = set()  # blocks this instance may write in place
+
+    def __getstate__(self):
+        # Pickled as one contiguous array, independent of the block layout
+        return {'array': self.to_array(), 'block_rows': self.block_rows}
+
+    def __setstate__(self, state):
+        self.__init__(state['array'], state['block_rows'])
+
+    def __len__(self):
+        return self._n_rows
+
+    @property
+    def shape(self):
+        return (self._n_rows, self.width)
+
+    @property
+    def nbytes(self):
+        return sum(block.nbytes for block in self._blocks)
+
+    def __getitem__(self, rows):
+        """Rows by index: one row for an int, a (len(rows) x width) array for an index array"""
+        if np.isscalar(rows):
+            row = int(rows) % self._n_rows if rows < 0 else int(rows)
+            return self._blocks[row // self.block_rows][row % self.block_rows]
+
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.where(rows < 0, rows + self._n_rows, rows)
+        result = np.empty((len(rows), self.width), dtype=self.dtype)
+        for block, positions in self._group_by_block(rows):
+            result[positions] = self._blocks[block][rows[positions] % self.block_rows]
+        return result
+
+    def to_array(self):
+        """All rows as one contiguous array (O(n_rows))"""
+        if not self._blocks:
+            return np.zeros((0, self.width), dtype=self.dtype)
+        return np.concatenate(self._blocks)
+
+    def column(self, position):
+        """One column of every row, e.g. each neighbor list's last score (O(n_rows))"""
+        if not self._blocks:
+            return np.zeros(0, dtype=self.dtype)
+        return np.concatenate([block[:, position] for block in self._blocks])
+
+    def copy(self):
+        """Copy sharing all blocks; whichever side writes a block first duplicates it"""
+        other = RowBlocks.__new__(RowBlocks)
+        other.block_rows = self.block_rows
+        other.width = self.width
+        other.dtype = self.dtype
+        other._blocks = list(self._blocks)
+        other._n_rows = self._n_rows
+        other._owned = set()
+        self._owned = set()
+        return other
+
+    def assign(self, rows, values):
+        """Set the given rows (copying each shared block they fall in once)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=self.dtype)
+        for block, positions in self._group_by_block(rows):
+            self._writable_block(block)[rows[positions] % self.block_rows] = values[positions]
+
+    def writable_row(self, row):
+        """View of one row that may be modified in place"""
+        return self._writable_block(row // self.block_rows)[row % self.block_rows]
+
+    def grow(self, n_rows, fill):
+        """Extend to n_rows rows, new rows set to fill"""
+        extra = n_rows - self._n_rows
+        if extra <= 0:
+            return
+        if self._blocks and len(self._blocks[-1]) < self.block_rows:
+            # Complete the partial last block (a new array, so sharers are unaffected)
+            last = self._blocks[-1]
+            padding = min(extra, self.block_rows - len(last))
+            self._blocks[-1] = np.concatenate([last, np.full((padding, self.width), fill, dtype=self.dtype)])
+            self._owned.add(len(self._blocks) - 1)
+            self._n_rows += padding
+            extra -= padding
+        while extra > 0:
+            size = min(extra, self.block_rows)
+            self._blocks.append(np.full((size, self.width), fill, dtype=self.dtype))
+            self._owned.add(len(self._blocks) - 1)
+            self._n_rows += size
+            extra -= size
+
+    def _writable_block(self, block):
+        if block not in self._owned:
+            self._blocks[block] = self._blocks[block].copy()
+            self._owned.add(block)
+        return self._blocks[block]
+
+    def _group_by_block(self, rows):
+        """(block, positions in rows) for every block the rows fall in"""
+        blocks = rows // self.block_rows
+        order = np.argsort(blocks, kind='stable')
+        boundaries = np.flatnonzero(np.diff(blocks[order])) + 1
+        for positions in np.split(order, boundaries):
+            if len(positions):
+                yield int(blocks[positions[0]]), positions
@@ -0,0 +1,151 @@
+"""
+Substitution Rule Store
+Substitution rules kept in flat arrays (CSR-style offsets per source
+ingredient plus parallel substitute / confidence / support / category arrays)
+instead of one Python dict per rule. Saved as .npy files, so a load can
+memory-map them and worker processes share the same pages.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+ARRAYS = ('offsets', 'substitute_ids', 'confidences', 'supports', 'category_ids')
+
+
+def _concatenate(arrays, dtype):
+    if not arrays:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate([np.asarray(array, dtype=dtype) for array in arrays])
+
+
+class SubstitutionRuleStore:
+    """
+    Substitutes of every ingredient, sorted by descending confidence per source
+
+    The substitutes of ingredient i are rows offsets[i]:offsets[i + 1] of the
+    parallel arrays, so the top-N substitutes are a single slice.
+    """
+
+    def __init__(self, ingredients, categories, offsets, substitute_ids, confidences, supports, category_ids):
+        """
+        Args:
+            ingredients: Ingredient names (id = position), sources and substitutes alike
+            categories: Category names (id = position)
+            offsets: int64 array of len(ingredients) + 1 row boundaries
+            substitute_ids: int32 ingredient id of each rule's substitute
+            confidences: float32 confidence of each rule
+            supports: float32 support of each rule
+            category_ids: int16 category id of each rule's substitute
+        """
+        self.ingredients = list(ingredients)
+        self.categories = list(categories)
+        self.ingredient_ids = {ing: idx for idx, ing in enumerate(self.ingredients)}
+        self.offsets = offsets
+        self.substitute_ids = substitute_ids
+        self.confidences = confidences
+        self.supports = supports
+        self.category_ids = category_ids
+
+    @classmethod
+    def from_rows(cls, ingredients, categories, ingredient_category_ids, rows):
+        """
+        Build a store from per-source rules
+
+        Args:
+            ingredients: Ingredient names (id = position)
+            categories: Category names (id = position)
+            ingredient_category_ids: Category id of every ingredient
+            rows: Iterable of (source id, substitute ids, confidences, supports),
+                  each row already sorted by descending confidence (one row per source)
+        """
+        rows = sorted(rows, key=lambda row: row[0])
+        counts = np.zeros(len(ingredients), dtype=np.int64)
+        for source, row_ids, _, _ in rows:
+            counts[source] += len(row_ids)
+
+        offsets = np.zeros(len(ingredients) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        substitute_ids = _concatenate([row[1] for row in rows], np.int32)
+        return cls(
+            ingredients, categories, offsets, substitute_ids,
+            _concatenate([row[2] for row in rows], np.float32),
+            _concatenate([row[3] for row in rows], np.float32),
+            np.asarray(ingredient_category_ids, dtype=np.int16)[substitute_ids]
+        )
+
+    def __len__(self):
+        """Number of ingredients with at least one substitute"""
+        return int(np.count_nonzero(np.diff(self.offsets)))
+
+    def __contains__(self, ingredient):
+        source = self.ingredient_ids.get(ingredient)
+        return source is not None and self.offsets[source + 1] > self.offsets[source]
+
+    def __iter__(self):
+        return iter(self.sources())
+
+    def sources(self):
+        """Ingredients with at least one substitute, in id order"""
+        return [self.ingredients[source] for source in np.flatnonzero(np.diff(self.offsets))]
+
+    def get(self, ingredient, top_n=None):
+        """
+        Substitutes of an ingredient
+
+        Args:
+            ingredient: Ingredient name
+            top_n: Number of substitutes to return (default: all)
+
+        Returns:
+            List of dictionaries with 'substitute', 'confidence', 'support' and
+            'category', by descending confidence
+        """
+        source = self.ingredient_ids.get(ingredient)
+        if source is None:
+            return []
+
+        start, end = int(self.offsets[source]), int(self.offsets[source + 1])
+        if top_n is not None:
+            end = min(end, start + max(top_n, 0))
+
+        rows = slice(start, end)
+        return [{
+            'substitute': self.ingredients[substitute],
+            'confidence': round(confidence, 3),
+            'support': round(support, 3),
+            'category': self.categories[category]
+        } for substitute, confidence, support, category in zip(
+            self.substitute_ids[rows].tolist(), self.confidences[rows].tolist(),
+            self.supports[rows].tolist(), self.category_ids[rows].tolist()
+        )]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def save(self, directory):
+        """Save the store as one .npy file per array plus the ingredient and category names"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'names.json'), 'w') as f:
+            json.dump({'ingredients': self.ingredients, 'categories': self.categories}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Load a saved store
+
+        Args:
+            directory: Directory written by save()
+            mmap_mode: numpy memory-map mode for the arrays ('r' maps them
+                       read-only without copying; None reads them into memory)
+        """
+        with open(os.path.join(directory, 'names.json')) as f:
+            names = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ARRAYS}
+        return cls(names['ingredients'], names['categories'], **arrays)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from models.recipe_recommender import RecipeRecommender
+
+
+@pytest.fixture
+def recommender():
+    return RecipeRecommender().train()
+
+
+def test_old_snapshot_stays_usable(recommender):
+    old = recommender.snapshot
+    old_store = recommender.ratings
+    before = recommender.predict_ratings([0])
+    before_item = recommender.predict_item_based_ratings([0])
+    before_als = recommender.get_user_based_recommendations(0, method='als')
+
+    recommender.add_ratings([{'user_id': 10, 'recipe_id': 1, 'rating': 5},
+                             {'user_id': 0, 'recipe_id': 2, 'rating': 1}])
+
+    np.testing.assert_array_equal(recommender.predict_ratings([0], old), before)
+    np.testing.assert_array_equal(recommender.predict_item_based_ratings([0], old), before_item)
+    assert old.ratings.n_users == 10 and len(old.user_neighbors.neighbors) == 10
+    assert len(old.factor_model.user_factors) == 10
+    # A bare store is scored against full similarity rows, not the newer neighbor lists
+    assert recommender.predict_ratings([0], old_store).shape == (1, 15)
+    assert recommender.predict_item_based_ratings([0], old_store).shape == (1, 15)
+
+    old_als = [rec['id'] for rec in before_als]
+    recommender.snapshot = old
+    assert [rec['id'] for rec in recommender.get_user_based_recommendations(0, method='als')] == old_als
+
+
+def test_published_snapshot_matches_retraining(recommender):
+    batch = [{'user_id': 10, 'recipe_id': recipe_id, 'rating': rating}
+             for recipe_id, rating in [(1, 5), (4, 4), (7, 5)]]
+    batch.append({'user_id': 3, 'recipe_id': 1, 'rating': 2})
+    recommender.add_ratings(batch, batch_size=2)
+
+    snapshot = recommender.snapshot
+    assert snapshot.ratings.n_users == 11
+    assert len(snapshot.user_neighbors.neighbors) == 11
+    assert len(snapshot.factor_model.user_factors) == 11
+
+    retrained = RecipeRecommender().train()
+    retrained.ratings = snapshot.ratings
+    retrained.user_neighbors = None
+    np.testing.assert_allclose(recommender.predict_ratings(range(11)),
+                               retrained.predict_ratings(range(11)), rtol=1e-5)
@@ -0,0 +1,16 @@
+import pytest
+
+from models.recipe_recommender import RecipeRecommender
+
+
+@pytest.fixture(scope='module')
+def recommenders():
+    return RecipeRecommender(n_content_neighbors=3).train(), RecipeRecommender().train()
+
+
+def test_top_n_beyond_precomputed_k_is_exact(recommenders):
+    truncated, full = recommenders
+    for recipe_id in (1, 5, 15):
+        recipe_ids = [rec['id'] for rec in truncated.get_content_based_recommendations(recipe_id, top_n=10)]
+        assert len(recipe_ids) == 10
+        assert recipe_ids == [rec['id'] for rec in full.get_content_based_recommendations(recipe_id, top_n=10)]
@@ -0,0 +1,13 @@
+from models.ingredient_clustering import IngredientClusterer
+
+
+def test_cluster_views_are_not_shared_with_callers():
+    clusterer = IngredientClusterer().train()
+    clusters, names = clusterer.get_clusters(), clusterer.get_cluster_names()
+    cluster_id = next(iter(clusters))
+    clusters[cluster_id].append('not an ingredient')
+    names[cluster_id] = 'renamed'
+    clusters.clear()
+
+    assert 'not an ingredient' not in clusterer.get_clusters()[cluster_id]
+    assert clusterer.get_cluster_names()[cluster_id] != 'renamed'
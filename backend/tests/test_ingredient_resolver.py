@@ -0,0 +1,46 @@
+import pytest
+
+from models.cuisine_classifier import CuisineClassifier
+from models.ingredient_resolver import IngredientResolver
+from models.nutrition_predictor import NutritionPredictor
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return CuisineClassifier().train()
+
+
+@pytest.fixture(scope='module')
+def nutrition_resolver():
+    return NutritionPredictor().resolver
+
+
+@pytest.mark.parametrize('name, wrong_term', [
+    ('ham', 'béchamel sauce'),
+    ('rum', 'breadcrumbs'),
+    ('ale', 'kale'),
+    ('ice', 'rice'),
+    ('pea', 'pear'),
+    ('nut', 'nutmeg'),
+])
+def test_cuisine_resolver_matches_whole_words(classifier, name, wrong_term):
+    assert classifier.resolver.resolve_term(name) != wrong_term
+
+
+@pytest.mark.parametrize('name', ['nut', 'rum', 'ice'])
+def test_nutrition_resolver_matches_whole_words(nutrition_resolver, name):
+    assert nutrition_resolver.resolve_term(name) is None
+
+
+def test_word_matches():
+    resolver = IngredientResolver(['chicken', 'chicken broth', 'black beans', 'olive oil', 'tomatoes', 'rice'])
+    assert resolver.resolve_term('Boneless chicken breast') == 'chicken'
+    assert resolver.resolve_term('beans') == 'black beans'
+    assert resolver.resolve_term('tomato') == 'tomatoes'
+    assert resolver.resolve_term('olive') is None
+    assert resolver.resolve_term('chick') is None
+    assert resolver.resolve_term('licorice') is None
+
+
+def test_partial_word_is_not_classified(classifier):
+    assert not classifier.predict_cuisine(['ham'])['success']
@@ -0,0 +1,27 @@
+import numpy as np
+
+from models.ingredient_search import IngredientSearchEngine, _top_positions
+from models.recipe_catalog import RecipeCatalog
+
+
+def test_top_positions_matches_full_sort():
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 5, 200) / 4  # plenty of ties, including at the cut
+    candidates = np.sort(rng.choice(10000, 200, replace=False))
+    expected = np.lexsort((candidates, -scores))
+
+    for top_n in (0, 1, 7, 50, 200, 500):
+        assert _top_positions(scores, candidates, top_n).tolist() == expected[:top_n].tolist()
+
+
+def test_catalog_names_are_normalized_like_queries():
+    catalog = RecipeCatalog([
+        {'id': 1, 'name': 'Padded', 'ingredients': [' Rice ', 'Salt']},
+        {'id': 2, 'name': 'Plain', 'ingredients': ['rice', 'beans']},
+    ])
+    results, total = IngredientSearchEngine(catalog).search(['rice', 'salt '])
+
+    assert total == 2
+    assert [result['recipe']['id'] for result in results] == [1, 2]
+    assert results[0]['matched_ingredients'] == ['rice', 'salt']
+    assert results[0]['overlap_score'] == 1.0
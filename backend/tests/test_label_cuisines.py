@@ -0,0 +1,47 @@
+import io
+import json
+
+import pytest
+
+from label_cuisines import label_stream, parse_line
+from models.cuisine_classifier import CuisineClassifier
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return CuisineClassifier(n_neighbors=5).train()
+
+
+def test_parse_line_rejects_non_string_list():
+    with pytest.raises(ValueError):
+        parse_line('[1, 2]')
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_bad_lines_are_reported_in_order(classifier, n_jobs):
+    lines = [
+        json.dumps({'id': 1, 'ingredients': ['pasta', 'basil', 'mozzarella']}),
+        '[1, 2]',
+        'not json',
+        json.dumps(['soy sauce', 'ginger', 'rice']),
+    ]
+    output = io.StringIO()
+
+    count = label_stream(lines, output, classifier, chunk_size=2, n_jobs=n_jobs)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert count == 4
+    assert [result['success'] for result in results] == [True, False, False, True]
+    assert results[0]['id'] == 1
+    assert 'Invalid line' in results[1]['error']
+
+
+def test_many_chunks_keep_input_order(classifier):
+    recipes = [['pasta', 'basil'], ['soy sauce', 'ginger'], ['tortillas', 'salsa']] * 7
+    lines = [json.dumps({'id': position, 'ingredients': recipe}) for position, recipe in enumerate(recipes)]
+    output = io.StringIO()
+
+    count = label_stream(lines, output, classifier, chunk_size=1, n_jobs=2)
+
+    assert count == len(recipes)
+    assert [json.loads(line)['id'] for line in output.getvalue().splitlines()] == list(range(len(recipes)))
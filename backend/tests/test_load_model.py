@@ -0,0 +1,32 @@
+import joblib
+import pytest
+
+from models.recipe_recommender import RecipeRecommender
+
+
+def test_loads_dense_format_model(tmp_path):
+    trained = RecipeRecommender().train()
+    path = tmp_path / 'old_model.pkl'
+    # Layout written before the sparse rating store and top-K neighbor lists
+    joblib.dump({
+        'recipes': trained.recipes,
+        'user_item_matrix': trained.ratings.csr.toarray(),
+        'recipe_features': trained.recipe_features,
+        'similarity_matrix': None
+    }, path)
+
+    loaded = RecipeRecommender()
+    loaded.load_model(str(path))
+
+    assert loaded.ratings.nnz == trained.ratings.nnz
+    for method in ('user', 'item', 'als'):
+        assert len(loaded.get_user_based_recommendations(0, top_n=5, method=method)) == 5
+    assert ([rec['id'] for rec in loaded.get_content_based_recommendations(1)] ==
+            [rec['id'] for rec in trained.get_content_based_recommendations(1)])
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    path = tmp_path / 'bad_model.pkl'
+    joblib.dump({'recipes': []}, path)
+    with pytest.raises(ValueError, match='Unrecognized model format'):
+        RecipeRecommender().load_model(str(path))
@@ -0,0 +1,41 @@
+import numpy as np
+
+from models.matrix_factorization import ALSMatrixFactorization
+from models.neighbors import ReverseNeighbors, UserNeighborhoodIndex
+from models.rating_store import RatingStore
+
+
+def _store(n_users=600, n_recipes=80, n_ratings=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    return RatingStore.from_triplets(rng.integers(0, n_users, n_ratings), rng.integers(0, n_recipes, n_ratings),
+                                     rng.integers(1, 6, n_ratings), shape=(n_users, n_recipes))
+
+
+def test_refresh_copies_only_touched_blocks():
+    store = _store()
+    index = UserNeighborhoodIndex(k=5).build(store)
+    before = index.neighbors.indices.to_array().copy()
+
+    updated = store.with_ratings([3], [7], [5])
+    refreshed = index.copy().refresh(updated, [3])
+
+    np.testing.assert_array_equal(index.neighbors.indices.to_array(), before)
+    shared = [old is new for old, new in zip(index.neighbors.indices._blocks, refreshed.neighbors.indices._blocks)]
+    assert any(shared) and not all(shared)
+
+    # The maintained reverse index matches one rebuilt from the refreshed lists
+    rebuilt = ReverseNeighbors.from_neighbors(refreshed.neighbors)
+    for row in range(updated.n_users):
+        assert refreshed.listed_by.rows_listing([row]).tolist() == rebuilt.rows_listing([row]).tolist()
+
+
+def test_update_users_shares_untouched_factor_blocks():
+    store = _store()
+    model = ALSMatrixFactorization(n_factors=4, n_iterations=3).fit(store)
+    before = model.user_factors.to_array().copy()
+
+    updated = model.copy().update_users(store.with_ratings([0, 600], [1, 2], [4, 5]), [0, 600])
+
+    np.testing.assert_array_equal(model.user_factors.to_array(), before)
+    assert len(updated.user_factors) == 601
+    assert updated.user_factors._blocks[1] is model.user_factors._blocks[1]
@@ -0,0 +1,42 @@
+"""
+The vectorized nutrition totals against the original per-ingredient loop,
+on the shipped catalog
+"""
+
+import numpy as np
+
+from models.nutrition_predictor import NutritionPredictor
+from models.recipe_catalog import get_world_catalog
+
+
+def reference_nutrition(predictor, ingredients):
+    """predict() as one lookup per ingredient, adding the nutrients one at a time"""
+    totals = dict.fromkeys(('calories', 'protein', 'fat', 'carbs', 'fiber'), 0)
+    matched_count = 0
+    for ingredient in ingredients:
+        key = predictor.resolver.resolve_term(ingredient.lower().strip())
+        if key is None:
+            continue
+        matched_count += 1
+        nutrition = predictor.ingredient_nutrition[key]
+        factor = predictor.PORTION_SIZES.get(key, predictor.PORTION_SIZES['default']) / 100.0
+        for nutrient in totals:
+            totals[nutrient] += nutrition[nutrient] * factor
+
+    if matched_count == 0:
+        return {'calories': 300, 'protein': 15.0, 'carbs': 40.0, 'fat': 10.0, 'fiber': 3.0}
+    return {nutrient: max(0, round(total) if nutrient == 'calories' else round(total, 1))
+            for nutrient, total in totals.items()}
+
+
+def test_nutrition_matches_reference_on_catalog():
+    predictor = NutritionPredictor()
+    recipes = [recipe['ingredients'] for recipe in get_world_catalog().recipes]
+    # Also shuffled lists, padded names and unknown ingredients
+    rng = np.random.default_rng(0)
+    recipes += [[f"  {ing.upper()} " for ing in rng.permutation(ingredients)] + ['unobtainium']
+                for ingredients in recipes]
+
+    expected = [reference_nutrition(predictor, ingredients) for ingredients in recipes]
+    assert predictor.predict_many(recipes) == expected
+    assert [predictor.predict(ingredients) for ingredients in recipes[:50]] == expected[:50]
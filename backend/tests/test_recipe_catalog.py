@@ -0,0 +1,19 @@
+import pytest
+
+from models.recipe_catalog import RecipeCatalog
+
+
+@pytest.mark.parametrize('batch', [
+    [{'id': 3, 'ingredients': ['rice']}, {'id': 1, 'ingredients': ['salt']}],
+    [{'id': 3, 'ingredients': ['rice']}, {'id': 3, 'ingredients': ['salt']}],
+])
+def test_rejected_batch_changes_nothing(batch):
+    catalog = RecipeCatalog([{'id': 1, 'name': 'One', 'ingredients': ['beans']}])
+    version = catalog.version
+
+    with pytest.raises(ValueError):
+        catalog.add_recipes(batch)
+
+    assert catalog.version == version
+    assert len(catalog) == 1 and 3 not in catalog
+    assert catalog.ids_with_ingredient('rice') == []
@@ -0,0 +1,45 @@
+"""
+The vectorized user-based scoring against the original per-recipe,
+per-user loop, on the sample ratings
+"""
+
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+from models.recipe_recommender import RecipeRecommender
+
+
+def reference_user_predictions(dense, user_id):
+    """Similarity-weighted average of the other users' ratings, recipe by recipe"""
+    similarity = cosine_similarity([dense[user_id]], dense)[0]
+    predicted = np.zeros(dense.shape[1])
+    for recipe_idx in range(dense.shape[1]):
+        raters = [other for other in range(len(dense))
+                  if other != user_id and dense[other, recipe_idx] > 0]
+        total_similarity = sum(similarity[other] for other in raters)
+        if total_similarity > 0:
+            predicted[recipe_idx] = sum(dense[other, recipe_idx] * similarity[other]
+                                        for other in raters) / total_similarity
+    return predicted
+
+
+@pytest.mark.parametrize('trained', [False, True])
+def test_user_based_scoring_matches_reference(trained):
+    recommender = RecipeRecommender()
+    if trained:
+        recommender.train()  # top-K neighbor weights (K covers every sample user)
+    else:
+        recommender.create_sample_data()  # full similarity rows
+    dense = recommender.ratings.csr.toarray()
+    user_ids = list(range(len(dense)))
+
+    predicted = recommender.predict_ratings(user_ids)
+    for user_id in user_ids:
+        expected = reference_user_predictions(dense, user_id)
+        np.testing.assert_allclose(predicted[user_id], expected, rtol=1e-6)  # ratings are stored as float32
+
+        unrated = np.flatnonzero(dense[user_id] == 0)
+        ranked = unrated[np.argsort(-np.round(expected[unrated], 6), kind='stable')][:5]
+        recommendations = recommender.get_user_based_recommendations(user_id, top_n=5)
+        assert [rec['id'] for rec in recommendations] == [recommender.recipes[idx]['id'] for idx in ranked]
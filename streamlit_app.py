@@ -226,29 +226,17 @@ elif feature == "📝 Content-Based Filtering":
         if st.button("Find Recipes", type="primary", key="ingr_search"):
             if ingredients_input:
                 ingredients = [ing.strip() for ing in ingredients_input.split(',')]
-                all_recipes = models['recommender'].get_all_recipes()
-                
-                # Score recipes
-                scored = []
-                for recipe in all_recipes:
-                    recipe_ings = set(ing.lower() for ing in recipe['ingredients'])
-                    input_ings = set(ing.lower() for ing in ingredients)
-                    overlap = len(recipe_ings.intersection(input_ings))
-                    
-                    if overlap > 0:
-                        score = overlap / len(recipe_ings)
-                        scored.append({
-                            **recipe,
-                            'overlap_score': score,
-                            'matched': list(recipe_ings.intersection(input_ings))
-                        })
-                
-                scored.sort(key=lambda x: x['overlap_score'], reverse=True)
+                matches, total_matches = models['recommender'].search_by_ingredients(ingredients, top_n=10)
+                scored = [{
+                    **match['recipe'],
+                    'overlap_score': match['overlap_score'],
+                    'matched': match['matched_ingredients']
+                } for match in matches]
                 
                 if scored:
-                    st.success(f"Found {len(scored)} matching recipes!")
+                    st.success(f"Found {total_matches} matching recipes!")
                     
-                    for idx, rec in enumerate(scored[:10], 1):
+                    for idx, rec in enumerate(scored, 1):
                         with st.expander(f"#{idx} - {rec['name']} - Match: {rec['overlap_score']*100:.0f}%"):
                             st.write(f"**Cuisine**: {rec['cuisine']}")
                             st.write(f"**Matched ingredients**: {', '.join(rec['matched'])}")
@@ -317,7 +305,7 @@ elif feature == "🔄 Ingredient Substitution":
     col1, col2 = st.columns([1, 2])
     
     with col1:
-        available_ingredients = sorted(models['substitution'].substitution_rules.keys())
+        available_ingredients = models['substitution'].get_ingredients_with_substitutes()
         
         ingredient = st.selectbox(
             "Select ingredient to substitute",